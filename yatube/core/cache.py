@@ -0,0 +1,145 @@
+import hashlib
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.cache import patch_response_headers
+
+MISSING = object()
+
+
+def get_cache():
+    return caches[settings.STAMPEDE_CACHE]
+
+
+def is_shared(alias):
+    """Кэш alias общий для всех воркеров: LocMemCache живёт в памяти
+    одного процесса, а DummyCache ничего не хранит."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def fresh(expires, delta, now, beta):
+    """Вероятностное досрочное истечение (XFetch): чем ближе срок и чем
+    дольше считалось значение, тем вероятнее пересчёт раньше срока.
+    Истекает ключ у одного запроса, а не у всех одновременно."""
+    return now - delta * beta * math.log(1 - random.random()) < expires
+
+
+def recompute(cache, key, compute, timeout, stale):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    expires = time.time() + timeout
+    # Запись живёт дольше логического срока на stale секунд: в этом окне
+    # пересчитывает один запрос, а остальные получают прежнее значение.
+    cache.set(key, (value, expires, delta), timeout + stale)
+    return value, expires
+
+
+def get_or_compute(key, compute, timeout, stale=None, beta=None):
+    """Значение ключа из кэша или compute() с защитой от лавины промахов.
+
+    Пересчитывает один процесс: он берёт блокировку cache.add, остальные
+    в это время отдают устаревшее значение (stale-while-revalidate), а при
+    пустом кэше ждут результата до STAMPEDE_LOCK_TIMEOUT секунд.
+    Возвращает пару (значение, время истечения по time.time()).
+    """
+    cache = get_cache()
+    stale = settings.STAMPEDE_STALE_TIMEOUT if stale is None else stale
+    beta = settings.STAMPEDE_BETA if beta is None else beta
+    lock_timeout = settings.STAMPEDE_LOCK_TIMEOUT
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + lock_timeout
+    while True:
+        entry = cache.get(key, MISSING)
+        if entry is not MISSING:
+            value, expires, delta = entry
+            if fresh(expires, delta, time.time(), beta):
+                return value, expires
+        token = uuid.uuid4().hex
+        if cache.add(lock_key, token, lock_timeout):
+            try:
+                return recompute(cache, key, compute, timeout, stale)
+            finally:
+                # Чужую блокировку (после истечения нашей) не снимаем.
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+        if entry is not MISSING:
+            return value, expires
+        if time.monotonic() >= deadline:
+            return recompute(cache, key, compute, timeout, stale)
+        time.sleep(settings.STAMPEDE_POLL_INTERVAL)
+
+
+def view_cache_key(request, prefix, per_user):
+    user = getattr(request, "user", None)
+    owner = (
+        user.pk if per_user and user is not None and user.is_authenticated
+        else "anon"
+    )
+    path = hashlib.md5(
+        request.build_absolute_uri().encode()
+    ).hexdigest()
+    return f"view:{prefix}:{owner}:{path}"
+
+
+class Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def cached_view(timeout, stale=None, beta=None, per_user=True):
+    """Замена cache_page с защитой от лавины промахов (get_or_compute).
+
+    Кэшируются ответы 200 на GET и HEAD. С per_user страница
+    авторизованного пользователя кэшируется отдельно от чужих.
+    """
+    def decorator(view_func):
+        prefix = f"{view_func.__module__}.{view_func.__name__}"
+
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+
+            def compute():
+                response = view_func(request, *args, **kwargs)
+                if response.streaming or response.status_code != 200:
+                    raise Uncacheable(response)
+                if hasattr(response, "render"):
+                    response.render()
+                return response
+
+            try:
+                response, expires = get_or_compute(
+                    view_cache_key(request, prefix, per_user), compute,
+                    timeout, stale, beta,
+                )
+            except Uncacheable as uncacheable:
+                return uncacheable.response
+            patch_response_headers(
+                response, max(0, math.ceil(expires - time.time()))
+            )
+            return response
+        return wrapped
+    return decorator
+
+
+def cached(prefix, timeout, stale=None, beta=None):
+    """То же для функций, строящих фрагмент или значение: ключ - prefix
+    и позиционные аргументы функции."""
+    def decorator(func):
+        @wraps(func)
+        def wrapped(*args):
+            key = ":".join([prefix, *(str(arg) for arg in args)])
+            return get_or_compute(
+                key, lambda: func(*args), timeout, stale, beta
+            )[0]
+        return wrapped
+    return decorator
@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_max_age, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|javascript|xml|xhtml\+xml)|image/svg\+xml)"
+)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = re.search(r"q=([0-9.]+)", params)
+        if not quality or float(quality.group(1)) > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(
+            content, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_LEVEL)
+
+
+def compressed_cache_key(content, encoding):
+    return f"compressed:{encoding}:{hashlib.sha1(content).hexdigest()}"
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов brotli или gzip по Accept-Encoding.
+
+    Не трогает потоковые ответы (SSE, stream_render), тела короче
+    COMPRESSION_MIN_LENGTH, несжимаемые типы и уже сжатое. Страницы
+    с CSRF-токеном тоже уходят несжатыми: по размеру сжатого ответа с
+    токеном рядом с отражённым вводом токен подбирается (BREACH). Ответы,
+    которые разрешено кэшировать (cached_view ставит max-age), сжимаются
+    один раз: байты лежат в кэше по хэшу содержимого столько же, сколько
+    живёт сама страница, и попадание в кэш index не сжимает её заново.
+    """
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or request.META.get("CSRF_COOKIE_USED")
+            or response.has_header("Content-Encoding")
+            or len(response.content) < settings.COMPRESSION_MIN_LENGTH
+            or not COMPRESSIBLE_TYPES.match(response.get("Content-Type", ""))
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+        compressed = self.compressed_content(response, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+    def compressed_content(self, response, encoding):
+        max_age = get_max_age(response)
+        if not max_age or "private" in response.get("Cache-Control", ""):
+            return compress(response.content, encoding)
+        cache = caches[settings.COMPRESSION_CACHE]
+        key = compressed_cache_key(response.content, encoding)
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(response.content, encoding)
+            cache.set(key, compressed, max_age)
+        return compressed
@@ -0,0 +1,239 @@
+import base64
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from PIL import Image, ImageOps
+
+FORMATS = {
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "png": "image/png",
+}
+SALT = "core.images"
+# Воркеры пула не наследуют fork'ом потоки и соединения процесса
+# приложения (блокировки логгера, сокеты БД, SSE).
+START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+pool = None
+pool_lock = threading.Lock()
+# Заданий в пуле не больше IMAGE_WORKERS * IMAGE_QUEUE_FACTOR: лишние
+# запросы ждут место IMAGE_TIMEOUT секунд и получают 503.
+slots = None
+# Оценка объёма кэша в этом процессе: полный обход каталога только
+# когда она превышает IMAGE_CACHE_MAX_BYTES.
+cache_size = None
+cache_lock = threading.Lock()
+
+
+class ImageError(Exception):
+    pass
+
+
+class ImageBusy(Exception):
+    """Пул не успел построить копию за IMAGE_TIMEOUT секунд."""
+
+
+def signature(name, width, height, fmt):
+    return salted_hmac(
+        SALT, f"{name}|{width}x{height}|{fmt}"
+    ).hexdigest()[:20]
+
+
+def make_token(name, width, height, fmt):
+    encoded = base64.urlsafe_b64encode(name.encode()).decode().rstrip("=")
+    return f"{encoded}.{signature(name, width, height, fmt)}"
+
+
+def read_token(token, width, height, fmt):
+    """Имя исходного файла из токена или None, если подпись не сходится."""
+    encoded, _, sign = token.rpartition(".")
+    try:
+        name = base64.urlsafe_b64decode(
+            encoded + "=" * (-len(encoded) % 4)
+        ).decode()
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not constant_time_compare(sign, signature(name, width, height, fmt)):
+        return None
+    return name
+
+
+def image_url(name, width, height, fmt="jpeg"):
+    return reverse("core:image", args=[
+        make_token(name, width, height, fmt), width, height, fmt
+    ])
+
+
+def resize(source, target, width, height, fmt, quality):
+    """Обрезка по центру до width x height (с увеличением, как у
+    миниатюр sorl). Выполняется в процессе пула: только Pillow и файлы."""
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if fmt == "jpeg" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, fmt.upper(), quality=quality, optimize=True)
+            os.replace(tmp, target)
+        except BaseException:
+            os.remove(tmp)
+            raise
+    return os.path.getsize(target)
+
+
+def get_pool():
+    global pool, slots
+    with pool_lock:
+        if pool is None:
+            workers = settings.IMAGE_WORKERS
+            pool = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context(START_METHOD)
+            )
+            slots = threading.BoundedSemaphore(
+                workers * settings.IMAGE_QUEUE_FACTOR
+            )
+        return pool
+
+
+def reset_pool(broken):
+    """Убирает пул, воркер которого упал: следующий запрос создаст
+    новый, а не получит BrokenProcessPool."""
+    global pool
+    with pool_lock:
+        if pool is broken:
+            pool = None
+    broken.shutdown(wait=False)
+
+
+def submit(*args):
+    """Ставит resize в пул. Пул, сломанный упавшим ранее заданием,
+    заменяется новым."""
+    executor = get_pool()
+    try:
+        return executor, executor.submit(resize, *args)
+    except BrokenProcessPool:
+        reset_pool(executor)
+        executor = get_pool()
+        return executor, executor.submit(resize, *args)
+
+
+def run_resize(*args):
+    if not settings.IMAGE_WORKERS:
+        return resize(*args)
+    get_pool()
+    semaphore = slots
+    if not semaphore.acquire(timeout=settings.IMAGE_TIMEOUT):
+        raise ImageBusy("пул обработки картинок занят")
+    try:
+        executor, future = submit(*args)
+    except BaseException:
+        semaphore.release()
+        raise
+    # Место освобождается, когда задание действительно завершилось: после
+    # таймаута ожидания оно ещё может занимать воркер.
+    future.add_done_callback(lambda _: semaphore.release())
+    try:
+        return future.result(timeout=settings.IMAGE_TIMEOUT)
+    except futures.TimeoutError as error:
+        # До Python 3.11 это не встроенный TimeoutError.
+        future.cancel()
+        raise ImageBusy("пул обработки картинок занят") from error
+    except BrokenProcessPool as error:
+        # Воркер упал на этой картинке (например, не хватило памяти).
+        reset_pool(executor)
+        raise ImageError("воркер обработки картинок упал") from error
+
+
+def cache_path(name, mtime, width, height, fmt):
+    key = hashlib.sha1(
+        f"{name}|{mtime}|{width}x{height}".encode()
+    ).hexdigest()
+    return os.path.join(settings.IMAGE_CACHE_DIR, key[:2], f"{key}.{fmt}")
+
+
+def scan_cache():
+    files = []
+    for root, _, names in os.walk(settings.IMAGE_CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+
+def evict():
+    """Удаляет давно не запрошенные файлы, пока кэш не уменьшится до
+    IMAGE_CACHE_LOW_WATERMARK от предела. Возвращает новый объём."""
+    files = scan_cache()
+    total = sum(size for _, size, _ in files)
+    limit = settings.IMAGE_CACHE_MAX_BYTES
+    if total <= limit:
+        return total
+    target = limit * settings.IMAGE_CACHE_LOW_WATERMARK
+    for _, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        total -= size
+    return total
+
+
+def account(size):
+    global cache_size
+    with cache_lock:
+        if cache_size is None:
+            cache_size = sum(size for _, size, _ in scan_cache())
+        else:
+            cache_size += size
+        if cache_size > settings.IMAGE_CACHE_MAX_BYTES:
+            cache_size = evict()
+
+
+def get_image(name, width, height, fmt):
+    """Путь к уменьшенной копии из дискового кэша, при промахе -
+    созданной в пуле процессов. Попадание обновляет mtime файла: по нему
+    вытесняются давно не запрошенные копии (LRU)."""
+    try:
+        source = default_storage.path(name)
+        mtime = int(os.stat(source).st_mtime)
+    except (OSError, NotImplementedError, ValueError) as error:
+        raise ImageError(name) from error
+    path = cache_path(name, mtime, width, height, fmt)
+    try:
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        size = run_resize(
+            source, path, width, height, fmt, settings.IMAGE_QUALITY
+        )
+    except (OSError, Image.DecompressionBombError) as error:
+        raise ImageError(name) from error
+    account(size)
+    return path
@@ -0,0 +1,26 @@
+import json
+import logging
+
+# Атрибуты, которые есть у любой LogRecord; всё прочее пришло в extra.
+STANDARD_ATTRS = set(vars(logging.LogRecord(
+    "", logging.INFO, "", 0, "", None, None
+))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON, поля extra - на верхнем уровне."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in STANDARD_ATTRS
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
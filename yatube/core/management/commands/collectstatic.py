@@ -0,0 +1,93 @@
+import os
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.management.commands import collectstatic
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import CommandError
+
+from core.templatetags.assets import VENDOR_BUNDLE
+
+
+def size(path):
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+
+def kilobytes(value):
+    return "-" if value is None else f"{value / 1024:.1f}"
+
+
+class Command(collectstatic.Command):
+    """collectstatic с отчётом о размерах собранных файлов: исходный,
+    .gz и .br, самые крупные сверху.
+
+    Без бандла сторонних скриптов (vendor_assets) команда завершается
+    ошибкой: иначе страницы тихо перейдут на CDN. Осознанно собрать
+    статику без него можно с --allow-cdn-scripts.
+    """
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--report-top", type=int, default=20,
+            help="Сколько самых крупных файлов показать в отчёте.",
+        )
+        parser.add_argument(
+            "--allow-cdn-scripts", action="store_true",
+            help="Собрать статику без бандла vendor_assets: base.html "
+                 "подключит скрипты с CDN.",
+        )
+
+    def handle(self, **options):
+        if (
+            not options["allow_cdn_scripts"]
+            and finders.find(VENDOR_BUNDLE) is None
+        ):
+            raise CommandError(
+                f"Нет static/{VENDOR_BUNDLE}: сначала запустите "
+                "python manage.py vendor_assets (или --allow-cdn-scripts)."
+            )
+        summary = super().handle(**options)
+        if options["verbosity"] >= 1 and not options["dry_run"]:
+            self.report(options["report_top"])
+        return summary
+
+    def collected_files(self):
+        # С manifest-хранилищем в STATIC_ROOT лежат и исходные имена, и
+        # хэшированные копии; отдаются хэшированные, их и считаем.
+        if hasattr(staticfiles_storage, "load_manifest"):
+            hashed = staticfiles_storage.load_manifest()
+            if hashed:
+                return sorted(hashed.values())
+        names = []
+        for root, _, files in os.walk(staticfiles_storage.location):
+            for name in files:
+                if not name.endswith((".gz", ".br")):
+                    path = os.path.join(root, name)
+                    names.append(os.path.relpath(
+                        path, staticfiles_storage.location
+                    ))
+        return sorted(names)
+
+    def report(self, top):
+        rows = []
+        for name in self.collected_files():
+            path = staticfiles_storage.path(name)
+            rows.append((
+                name, size(path), size(path + ".gz"), size(path + ".br")
+            ))
+        rows = [row for row in rows if row[1] is not None]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        self.stdout.write(f"\n{'Файл':<60} {'КБ':>8} {'gzip':>8} {'br':>8}")
+        for name, raw, gz, br in rows[:top]:
+            self.stdout.write(
+                f"{name[-60:]:<60} {kilobytes(raw):>8} "
+                f"{kilobytes(gz):>8} {kilobytes(br):>8}"
+            )
+        totals = [
+            sum(row[column] or row[1] for row in rows)
+            for column in (1, 2, 3)
+        ]
+        self.stdout.write(
+            f"{f'Всего файлов: {len(rows)}':<60} "
+            + " ".join(f"{kilobytes(total):>8}" for total in totals)
+        )
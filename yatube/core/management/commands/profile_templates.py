@@ -0,0 +1,87 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.template_profiling import includes_in_loops, profile_templates
+from posts.models import Group, Post
+
+User = get_user_model()
+
+FEED_TEMPLATES = (
+    "posts/index.html",
+    "posts/group_list.html",
+    "posts/profile.html",
+    "posts/follow.html",
+    "posts/post_detail.html",
+    "posts/includes/feed_fragment.html",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Рендерит ленту из 10/100/1000 постов без обращений к БД "
+        "и печатает время по шаблонам и {% include %}."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[10, 100, 1000]
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--top", type=int, default=10)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        for size in options["sizes"]:
+            context = {"page_obj": Paginator(fake_posts(size), size).page(1)}
+            best = None
+            for _ in range(options["repeat"]):
+                with profile_templates() as profile:
+                    started = time.perf_counter()
+                    render_to_string("posts/index.html", context, request)
+                    elapsed = time.perf_counter() - started
+                if best is None or elapsed < best[0]:
+                    best = (elapsed, profile)
+            elapsed, profile = best
+            self.stdout.write(
+                f"{size} постов: {elapsed * 1000:.1f} мс "
+                f"({elapsed * 10 ** 6 / size:.0f} мкс на пост)"
+            )
+            for name, calls, total, per_call in profile.report()[
+                :options["top"]
+            ]:
+                self.stdout.write(
+                    f"  {name:<50} {calls:>6} x {per_call:8.3f} мс"
+                    f" = {total:9.1f} мс"
+                )
+        for template_name in FEED_TEMPLATES:
+            for parent, included, loop in includes_in_loops(template_name):
+                self.stdout.write(self.style.WARNING(
+                    f"{parent}: {{% include {included} %}} внутри "
+                    f"{{% for {loop} %}} - встроить или кэшировать фрагмент"
+                ))
+
+
+def fake_posts(count):
+    author = User(pk=1, username="author", first_name="Автор")
+    group = Group(pk=1, title="Группа", slug="group")
+    now = timezone.now()
+    return [
+        Post(
+            pk=number,
+            text=f"Пост {number} со ссылкой https://example.com/{number}\n"
+                 "и переносом строки",
+            author=author,
+            group=group if number % 2 else None,
+            pub_date=now - timedelta(minutes=number),
+        )
+        for number in range(1, count + 1)
+    ]
@@ -0,0 +1,73 @@
+import json
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = {
+    "total": lambda stats: stats["total"],
+    "count": lambda stats: stats["count"],
+    "max": lambda stats: stats["max"],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сводка журнала медленных запросов по отпечаткам SQL: число, "
+        "суммарное и максимальное время, view, место вызова и план."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=settings.SLOW_QUERY_LOG)
+        parser.add_argument("--top", type=int, default=10)
+        parser.add_argument("--sort", choices=SORT_KEYS, default="total")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options["path"]):
+            raise CommandError(f"Нет журнала {options['path']}")
+        stats = {}
+        with open(options["path"]) as log:
+            for line in log:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.add(stats, entry)
+        offenders = sorted(
+            stats.values(), key=SORT_KEYS[options["sort"]], reverse=True
+        )[:options["top"]]
+        for number, item in enumerate(offenders, start=1):
+            self.stdout.write(
+                f"{number}. {item['fingerprint']}: {item['count']} раз, "
+                f"всего {item['total']:.1f} мс, "
+                f"в среднем {item['total'] / item['count']:.1f} мс, "
+                f"максимум {item['max']:.1f} мс"
+            )
+            self.stdout.write(f"   {item['normalized']}")
+            for view, count in item["views"].most_common(3):
+                self.stdout.write(f"   view {view}: {count}")
+            for place, count in item["callers"].most_common(3):
+                self.stdout.write(f"   из {place}: {count}")
+            if item["plan"]:
+                for line in item["plan"].splitlines():
+                    self.stdout.write(f"   | {line}")
+
+    def add(self, stats, entry):
+        item = stats.setdefault(entry["fingerprint"], {
+            "fingerprint": entry["fingerprint"],
+            "normalized": entry["normalized"],
+            "count": 0,
+            "total": 0.0,
+            "max": 0.0,
+            "views": Counter(),
+            "callers": Counter(),
+            "plan": None,
+        })
+        item["count"] += 1
+        item["total"] += entry["ms"]
+        item["max"] = max(item["max"], entry["ms"])
+        item["views"][entry.get("view") or "-"] += 1
+        if entry.get("caller"):
+            item["callers"][entry["caller"]] += 1
+        item["plan"] = entry.get("plan") or item["plan"]
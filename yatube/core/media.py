@@ -0,0 +1,106 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class PartialFile:
+    """Отрезок открытого файла для FileResponse: без fileno() и name,
+    поэтому сервер читает его через read(), а не отдаёт файл целиком."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def etag_matches(header, etag):
+    """If-None-Match и If-Range сравниваются слабо: W/"x" равен "x"."""
+    if header is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in (
+        tag[2:] if tag.startswith("W/") else tag for tag in tags
+    )
+
+
+def parse_range(header, size):
+    """(start, end) включительно для одного диапазона, None - отдать
+    файл целиком, ValueError - диапазон вне файла (416).
+
+    Несколько диапазонов (multipart/byteranges) не поддерживаются:
+    на них отдаётся весь файл, что RFC 7233 разрешает.
+    """
+    match = RANGE.match(header or "")
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def content_type(path):
+    guessed, encoding = mimetypes.guess_type(path)
+    if encoding is not None:
+        # Сжатые файлы отдаются как есть, без Content-Encoding.
+        return "application/octet-stream"
+    return guessed or "application/octet-stream"
+
+
+def has_access(request, path):
+    """Все функции MEDIA_ACCESS_CHECKS(request, path) разрешили доступ."""
+    return all(
+        import_string(check)(request, path)
+        for check in settings.MEDIA_ACCESS_CHECKS
+    )
+
+
+def accel_headers(path, full_path):
+    """Заголовок, передающий отдачу файла фронтенд-серверу, или None.
+
+    Путь кодируется как в URL: имена загрузок бывают не-ASCII, а такой
+    заголовок Django закодировал бы по RFC 2047 (=?utf-8?b?...?=), и
+    сервер не нашёл бы файл. nginx, mod_xsendfile и lighttpd декодируют
+    %XX сами.
+    """
+    if settings.MEDIA_ACCEL == "x-accel":
+        return {
+            "X-Accel-Redirect": quote(settings.MEDIA_ACCEL_PREFIX + path)
+        }
+    if settings.MEDIA_ACCEL == "x-sendfile":
+        return {"X-Sendfile": quote(full_path)}
+    return None
+
+
+def cache_control():
+    if settings.MEDIA_ACCESS_CHECKS:
+        return "private, no-cache"
+    return f"public, max-age={settings.MEDIA_MAX_AGE}"
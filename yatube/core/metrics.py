@@ -0,0 +1,295 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+
+access_logger = logging.getLogger("yatube.access")
+
+MISSING = object()
+# Метод запроса приходит от клиента: всё вне этого списка считается
+# как "other", чтобы число рядов метрики оставалось ограниченным.
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+def method_label(method):
+    return method if method in METHODS else "other"
+
+
+class Registry:
+    """Метрики процесса: запросы по маршруту, методу и статусу,
+    гистограммы задержки и времени в БД, попадания в кэш.
+
+    Снимок периодически пишется в METRICS_DIR/<pid>-<запуск>.json, а
+    /metrics складывает снимки всех процессов (воркеров gunicorn/uwsgi).
+    Счётчики накопительные, поэтому файлы завершившихся процессов не
+    удаляются: иначе суммы уменьшались бы. Время запуска в имени не даёт
+    новому воркеру с тем же pid затереть снимок прежнего.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = defaultdict(int)
+            self.latency = defaultdict(self.empty_histogram)
+            self.db_time = defaultdict(self.empty_histogram)
+            self.db_queries = defaultdict(int)
+            self.cache = defaultdict(int)
+            self.flushed = 0
+
+    @staticmethod
+    def empty_histogram():
+        return {
+            "buckets": [0] * (len(settings.METRICS_BUCKETS) + 1),
+            "sum": 0.0,
+            "count": 0,
+        }
+
+    @staticmethod
+    def observe(histogram, value):
+        bucket = bisect_left(settings.METRICS_BUCKETS, value)
+        histogram["buckets"][bucket] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+    def record_request(self, route, method, status, duration, db_time,
+                       queries):
+        with self.lock:
+            self.requests[route, method_label(method), status] += 1
+            self.observe(self.latency[route], duration)
+            self.observe(self.db_time[route], db_time)
+            self.db_queries[route] += queries
+
+    def record_cache(self, hit):
+        with self.lock:
+            self.cache["hit" if hit else "miss"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            # В JSON ключами бывают только строки: запросы хранятся
+            # списком строк [маршрут, метод, статус, число].
+            return json.loads(json.dumps({
+                "requests": [
+                    [*key, count] for key, count in self.requests.items()
+                ],
+                "latency": self.latency,
+                "db_time": self.db_time,
+                "db_queries": self.db_queries,
+                "cache": self.cache,
+            }))
+
+    def flush(self, force=False):
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+            not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        self.flushed = now
+        os.makedirs(directory, exist_ok=True)
+        # Запись во временный файл и rename: читатель не увидит половину.
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as out:
+            json.dump(self.snapshot(), out)
+        os.replace(tmp, os.path.join(directory, self.snapshot_name()))
+
+    def snapshot_name(self):
+        # Реестр создаётся до fork воркеров: pid и время запуска
+        # запоминаются в самом процессе при первой записи.
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid, self.started = pid, time.time_ns()
+        return f"{pid}-{self.started}.json"
+
+
+registry = Registry()
+
+
+def empty_total():
+    return {name: {} for name in (
+        "requests", "latency", "db_time", "db_queries", "cache"
+    )}
+
+
+def request_rows(requests):
+    """Строки [маршрут, метод, статус, число] снимка. Снимки прежнего
+    формата со строками "маршрут|метод|статус" читаются, ключи с лишним
+    "|" (метод от клиента) отбрасываются."""
+    if isinstance(requests, list):
+        return requests
+    rows = []
+    for key, count in requests.items():
+        parts = key.split("|")
+        if len(parts) == 3 and parts[2].isdigit():
+            rows.append([parts[0], parts[1], int(parts[2]), count])
+    return rows
+
+
+def merge(total, snapshot):
+    for route, method, status, count in request_rows(snapshot["requests"]):
+        key = (route, method_label(method), status)
+        total["requests"][key] = total["requests"].get(key, 0) + count
+    for name in ("db_queries", "cache"):
+        for key, value in snapshot[name].items():
+            total[name][key] = total[name].get(key, 0) + value
+    for name in ("latency", "db_time"):
+        for route, histogram in snapshot[name].items():
+            merged = total[name].setdefault(route, {
+                "buckets": [0] * len(histogram["buckets"]),
+                "sum": 0.0,
+                "count": 0,
+            })
+            merged["buckets"] = [
+                a + b for a, b in zip(merged["buckets"], histogram["buckets"])
+            ]
+            merged["sum"] += histogram["sum"]
+            merged["count"] += histogram["count"]
+    return total
+
+
+def collect():
+    """Сумма снимков всех процессов (или только текущего без METRICS_DIR)."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return merge(empty_total(), registry.snapshot())
+    registry.flush(force=True)
+    total = empty_total()
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as snapshot:
+                merge(total, json.load(snapshot))
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+def label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_histogram(lines, name, histograms):
+    lines.append(f"# TYPE {name} histogram")
+    bounds = [str(bound) for bound in settings.METRICS_BUCKETS] + ["+Inf"]
+    for route, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(bounds, histogram["buckets"]):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{{route="{label(route)}",le="{bound}"}} '
+                f"{cumulative}"
+            )
+        lines.append(f'{name}_sum{{route="{label(route)}"}} '
+                     f'{histogram["sum"]:.6f}')
+        lines.append(f'{name}_count{{route="{label(route)}"}} '
+                     f'{histogram["count"]}')
+
+
+def render_prometheus(metrics):
+    lines = ["# TYPE yatube_requests_total counter"]
+    for (route, method, status), count in sorted(
+        metrics["requests"].items()
+    ):
+        lines.append(
+            f'yatube_requests_total{{route="{label(route)}",'
+            f'method="{label(method)}",status="{status}"}} {count}'
+        )
+    render_histogram(
+        lines, "yatube_request_duration_seconds", metrics["latency"]
+    )
+    render_histogram(lines, "yatube_db_duration_seconds", metrics["db_time"])
+    lines.append("# TYPE yatube_db_queries_total counter")
+    for route, count in sorted(metrics["db_queries"].items()):
+        lines.append(
+            f'yatube_db_queries_total{{route="{label(route)}"}} {count}'
+        )
+    lines.append("# TYPE yatube_cache_requests_total counter")
+    for result, count in sorted(metrics["cache"].items()):
+        lines.append(
+            f'yatube_cache_requests_total{{result="{result}"}} {count}'
+        )
+    return "\n".join(lines) + "\n"
+
+
+class QueryTimer:
+    """execute_wrapper: суммирует время и число SQL-запросов."""
+
+    def __init__(self):
+        self.duration = 0.0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """Замеряет каждый запрос и пишет строку access-лога.
+
+    Маршрут - имя URL ("posts:profile"), а не путь, чтобы число рядов
+    метрик не зависело от числа пользователей и постов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else "unmatched"
+        registry.record_request(
+            route, request.method, response.status_code, duration,
+            timer.duration, timer.queries,
+        )
+        registry.flush()
+        user = getattr(request, "user", None)
+        access_logger.info(
+            "%s %s %s", request.method, request.path, response.status_code,
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "route": route,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "db_ms": round(timer.duration * 1000, 2),
+                "db_queries": timer.queries,
+                "user_id": (
+                    user.pk if user is not None and user.is_authenticated
+                    else None
+                ),
+                "remote_addr": request.META.get("REMOTE_ADDR"),
+            },
+        )
+        return response
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache, который считает попадания и промахи get()."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        registry.record_cache(value is not MISSING)
+        return default if value is MISSING else value
@@ -0,0 +1,89 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """Оценка числа строк по статистике планировщика PostgreSQL.
+
+    Только для нефильтрованных запросов; в остальных случаях и на других
+    СУБД возвращает None.
+    """
+    if queryset.query.where or queryset.query.distinct:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE relname = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def count_cache_key(queryset):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f"{queryset.db}:{sql}:{params!r}".encode())
+    return f"paginator:count:{digest.hexdigest()}"
+
+
+def approximate_count(queryset):
+    """Число строк запроса и признак точности, см.
+    ApproximateCountPaginator."""
+    queryset = queryset.order_by()
+    limit = settings.PAGINATOR_EXACT_COUNT_LIMIT
+    bounded = queryset[:limit + 1].count()
+    if bounded <= limit:
+        return bounded, True
+    estimate = estimated_count(queryset)
+    if estimate is not None:
+        return max(estimate, bounded), False
+    key = count_cache_key(queryset)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATOR_COUNT_CACHE_TIMEOUT)
+    return count, False
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator без COUNT(*) по огромным таблицам.
+
+    До PAGINATOR_EXACT_COUNT_LIMIT строк считает точно, но запросом
+    с LIMIT, который не читает таблицу целиком. Выше порога берёт оценку
+    планировщика PostgreSQL, а если её нет (фильтр, другая СУБД) -
+    точный счёт, закэшированный на PAGINATOR_COUNT_CACHE_TIMEOUT секунд.
+    Для показа пользователю есть display_count: "1000+" вместо неточного
+    числа.
+
+    Последовательности из нескольких запросов (posts.archive.ChainedPosts)
+    считают себя сами методом approximate_count() с тем же результатом.
+    """
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, "query"):
+            count, self.count_is_exact = approximate_count(self.object_list)
+            return count
+        if hasattr(self.object_list, "approximate_count"):
+            count, self.count_is_exact = (
+                self.object_list.approximate_count()
+            )
+            return count
+        self.count_is_exact = True
+        return super().count
+
+    @property
+    def display_count(self):
+        count = self.count
+        if self.count_is_exact:
+            return count
+        return f"{settings.PAGINATOR_EXACT_COUNT_LIMIT}+"
@@ -0,0 +1,213 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from .template_profiling import profile_templates
+
+PROFILE_NAME = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{8}$")
+
+# Одновременно профилируется один запрос на процесс: подмена методов
+# шаблонов в profile_templates рассчитана на одного владельца.
+busy = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def short_path(filename):
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def collapse(frame):
+    """Стек в формате collapsed stacks (flamegraph.pl, speedscope):
+    кадры от корня через ";"."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            f"{code.co_name} "
+            f"({short_path(code.co_filename)}:{code.co_firstlineno})"
+            .replace(";", ",")
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler(threading.Thread):
+    """Раз в interval секунд снимает стек потока target."""
+
+    def __init__(self, target, interval):
+        super().__init__(name="yatube-profiler", daemon=True)
+        self.target = target
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class QueryLog:
+    """execute_wrapper: SQL и время каждого запроса."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+
+def should_profile(request):
+    if not settings.PROFILER_ENABLED:
+        return False
+    token = settings.PROFILER_TOKEN
+    if token and constant_time_compare(
+        request.META.get("HTTP_X_PROFILE", ""), token
+    ):
+        return True
+    user = getattr(request, "user", None)
+    if "_profile" in request.GET and user is not None and user.is_staff:
+        return True
+    rate = settings.PROFILER_SAMPLE_RATE
+    return bool(rate) and random.randrange(rate) == 0
+
+
+def save_profile(meta, stacks):
+    directory = settings.PROFILER_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = meta["name"]
+    with open(os.path.join(directory, f"{name}.folded"), "w") as folded:
+        for stack, count in stacks.most_common():
+            folded.write(f"{stack} {count}\n")
+    with open(os.path.join(directory, f"{name}.json"), "w") as out:
+        json.dump(meta, out, ensure_ascii=False)
+    for old in list_profiles()[settings.PROFILER_KEEP:]:
+        for suffix in (".json", ".folded"):
+            try:
+                os.remove(os.path.join(directory, old["name"] + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """Метаданные сохранённых профилей, новые первыми."""
+    directory = settings.PROFILER_DIR
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(
+        (name[:-5] for name in os.listdir(directory)
+         if name.endswith(".json") and PROFILE_NAME.match(name[:-5])),
+        reverse=True,
+    )
+    profiles = []
+    for name in names:
+        try:
+            profiles.append(load_profile(name))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def load_profile(name):
+    if not PROFILE_NAME.match(name):
+        raise ValueError(name)
+    path = os.path.join(settings.PROFILER_DIR, f"{name}.json")
+    with open(path) as meta:
+        return json.load(meta)
+
+
+def stacks_path(name):
+    if not PROFILE_NAME.match(name):
+        raise ValueError(name)
+    return os.path.join(settings.PROFILER_DIR, f"{name}.folded")
+
+
+class ProfilerMiddleware:
+    """Профилирует отдельные запросы: по заголовку X-Profile с секретом
+    PROFILER_TOKEN, по ?_profile для staff или случайно один из
+    PROFILER_SAMPLE_RATE.
+
+    Сохраняет статистический профиль стека (collapsed stacks для
+    flamegraph), время SQL-запросов и шаблонов в PROFILER_DIR. Тело
+    потоковых ответов формируется после middleware и в профиль не входит.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request) or not busy.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            busy.release()
+
+    def profile(self, request):
+        queries = QueryLog()
+        sampler = Sampler(threading.get_ident(), settings.PROFILER_INTERVAL)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            templates = stack.enter_context(profile_templates())
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+        duration = time.perf_counter() - started
+        now = timezone.now()
+        match = getattr(request, "resolver_match", None)
+        user = getattr(request, "user", None)
+        meta = {
+            "name": f"{now:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}",
+            "created": now.isoformat(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "route": match.view_name if match else None,
+            "user": (
+                user.get_username()
+                if user is not None and user.is_authenticated else None
+            ),
+            "status": response.status_code,
+            "duration_ms": duration * 1000,
+            "samples": sum(sampler.stacks.values()),
+            "sql_ms": sum(elapsed for _, elapsed in queries.queries) * 1000,
+            "queries": [
+                {"sql": sql, "ms": elapsed * 1000}
+                for sql, elapsed in sorted(
+                    queries.queries, key=lambda query: query[1], reverse=True
+                )[:settings.PROFILER_MAX_QUERIES]
+            ],
+            "query_count": len(queries.queries),
+            "templates": templates.report(),
+        }
+        save_profile(meta, sampler.stacks)
+        response["X-Profile-Id"] = meta["name"]
+        return response
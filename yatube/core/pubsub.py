@@ -0,0 +1,230 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+
+
+class HubFull(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, hub, channels, queue_size):
+        self.hub = hub
+        self.channels = channels
+        self.queue = queue.Queue(queue_size)
+        self.overflowed = False
+        self.closed = False
+
+    def put(self, message):
+        # Медленный клиент не копит события бесконечно: при переполнении
+        # очереди поток закрывается, браузер переподключится сам.
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """Публикация событий подписчикам каналов внутри процесса.
+
+    Если задан ``cache_alias``, события пишутся в общий кэш с порядковым
+    номером на канал, а один фоновый поток процесса опрашивает кэш по
+    каналам, на которые есть подписчики. Так события доходят до клиентов,
+    подключённых к любому воркеру.
+    """
+
+    def __init__(self, max_connections=100, queue_size=100, cache_alias=None,
+                 poll_interval=0.5, message_timeout=60):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.cache_alias = cache_alias
+        self.poll_interval = poll_interval
+        self.message_timeout = message_timeout
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+        self.connections = 0
+        self.cursors = {}
+        self.poller = None
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def subscribe(self, channels):
+        with self.lock:
+            if self.connections >= self.max_connections:
+                raise HubFull
+            subscription = Subscription(self, channels, self.queue_size)
+            self.connections += 1
+            for channel in channels:
+                self.channels[channel].add(subscription)
+            if self.cache_alias:
+                self.start_polling(channels)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            self.connections -= 1
+            for channel in subscription.channels:
+                subscribers = self.channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.channels[channel]
+                    self.cursors.pop(channel, None)
+
+    def publish(self, channel, event, data):
+        message = (event, data)
+        if not self.cache_alias:
+            self.deliver(channel, message)
+            return
+        counter = self.counter_key(channel)
+        self.cache.add(counter, 0, None)
+        number = self.cache.incr(counter)
+        self.cache.set(
+            self.message_key(channel, number), message, self.message_timeout
+        )
+
+    def deliver(self, channel, message):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def counter_key(self, channel):
+        return f"pubsub:{channel}"
+
+    def message_key(self, channel, number):
+        return f"pubsub:{channel}:{number}"
+
+    def start_polling(self, channels):
+        counters = self.cache.get_many(
+            [self.counter_key(channel) for channel in channels]
+        )
+        for channel in channels:
+            self.cursors.setdefault(
+                channel, counters.get(self.counter_key(channel), 0)
+            )
+        if self.poller is None:
+            self.poller = threading.Thread(target=self.poll, daemon=True)
+            self.poller.start()
+
+    def poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self.lock:
+                cursors = dict(self.cursors)
+                if not cursors:
+                    self.poller = None
+                    return
+            self.poll_once(cursors)
+
+    def poll_once(self, cursors):
+        counters = self.cache.get_many(
+            [self.counter_key(channel) for channel in cursors]
+        )
+        for channel, seen in cursors.items():
+            latest = counters.get(self.counter_key(channel), 0)
+            if latest <= seen:
+                continue
+            first = max(seen + 1, latest - self.queue_size + 1)
+            keys = [
+                self.message_key(channel, number)
+                for number in range(first, latest + 1)
+            ]
+            messages = self.cache.get_many(keys)
+            for key in keys:
+                if key in messages:
+                    self.deliver(channel, messages[key])
+            with self.lock:
+                if channel in self.cursors:
+                    self.cursors[channel] = latest
+
+
+hub = None
+
+
+def get_hub():
+    global hub
+    if hub is None:
+        hub = Hub(
+            max_connections=settings.SSE_MAX_CONNECTIONS,
+            queue_size=settings.SSE_QUEUE_SIZE,
+            cache_alias=settings.PUBSUB_CACHE,
+        )
+    return hub
+
+
+def publish(channel, event, data):
+    get_hub().publish(channel, event, data)
+
+
+def event_stream(subscription, keepalive=None, max_duration=None):
+    """Генератор тела ответа text/event-stream для подписки."""
+    keepalive = keepalive or settings.SSE_KEEPALIVE
+    deadline = time.monotonic() + (max_duration or settings.SSE_MAX_DURATION)
+    try:
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline and not subscription.overflowed:
+            message = subscription.get(keepalive)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            event, data = message
+            payload = json.dumps(data, cls=DjangoJSONEncoder,
+                                 ensure_ascii=False)
+            yield f"event: {event}\ndata: {payload}\n\n"
+    finally:
+        subscription.close()
+
+
+class EventStream:
+    """Тело ответа SSE. close() вызывается сервером при закрытии ответа и
+    снимает подписку, даже если тело не читали (HEAD, разрыв соединения,
+    ошибка в middleware): finally генератора тогда не выполняется."""
+
+    def __init__(self, subscription):
+        self.subscription = subscription
+        self.stream = event_stream(subscription)
+
+    def __iter__(self):
+        return self.stream
+
+    def close(self):
+        self.stream.close()
+        self.subscription.close()
+
+
+def sse_response(channels):
+    try:
+        subscription = get_hub().subscribe(channels)
+    except HubFull:
+        response = HttpResponse(status=503)
+        response["Retry-After"] = settings.SSE_KEEPALIVE
+        return response
+    response = StreamingHttpResponse(
+        EventStream(subscription), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,133 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+DEFAULT_METHODS = ("POST",)
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): не больше 10 запросов в минуту."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+def client_ip(request):
+    """Адрес клиента. За прокси REMOTE_ADDR - адрес самого прокси, тогда
+    адрес берётся из RATELIMIT_IP_HEADER: в X-Forwarded-For доверенный
+    прокси дописывает адрес справа, поэтому нужный элемент -
+    RATELIMIT_TRUSTED_PROXIES-й с конца. Остальные подставляет клиент."""
+    header = settings.RATELIMIT_IP_HEADER
+    if not header:
+        return request.META.get("REMOTE_ADDR", "")
+    addresses = [
+        address.strip()
+        for address in request.META.get(header, "").split(",")
+        if address.strip()
+    ]
+    if len(addresses) < settings.RATELIMIT_TRUSTED_PROXIES:
+        return request.META.get("REMOTE_ADDR", "")
+    return addresses[-settings.RATELIMIT_TRUSTED_PROXIES]
+
+
+def client_key(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+def consume(key, rate, now=None):
+    """Учитывает запрос ключа в текущем окне (fixed window).
+
+    Не корзина токенов: её состояние пришлось бы читать и записывать
+    заново, а атомарного compare-and-set у кэшей Django нет. Окно длиной
+    в период начинается с кратного периоду момента, его счётчик
+    увеличивается атомарным cache.incr - обычно одно обращение к кэшу
+    на запрос, без БД. Цена простоты: на стыке двух окон клиент может
+    успеть сделать до 2 * count запросов.
+
+    Возвращает 0, если запрос разрешён, иначе число секунд до начала
+    следующего окна.
+    """
+    count, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    cache = caches[settings.RATELIMIT_CACHE]
+    window = int(now // period)
+    cache_key = f"ratelimit:{key}:{window}"
+    try:
+        used = cache.incr(cache_key)
+    except ValueError:
+        # Первый запрос в окне; add проигрывает, если счётчик
+        # одновременно создал другой воркер.
+        if cache.add(cache_key, 1, period):
+            used = 1
+        else:
+            used = cache.incr(cache_key)
+    if used > count:
+        return max(1, math.ceil((window + 1) * period - now))
+    return 0
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        "Слишком много запросов, попробуйте позже.",
+        status=429,
+        content_type="text/plain; charset=utf-8",
+    )
+    response["Retry-After"] = retry_after
+    return response
+
+
+def check(request, name, rate, methods=DEFAULT_METHODS):
+    if request.method not in methods:
+        return None
+    retry_after = consume(f"{name}:{client_key(request)}", rate)
+    if retry_after:
+        return too_many_requests(retry_after)
+    return None
+
+
+def ratelimit(rate, methods=DEFAULT_METHODS):
+    """Декоратор view: ограничивает частоту запросов пользователя или IP."""
+    def decorator(view_func):
+        name = f"{view_func.__module__}.{view_func.__name__}"
+
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            limited = check(request, name, rate, methods)
+            if limited is not None:
+                return limited
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Применяет settings.RATELIMITS по имени URL ("posts:add_comment").
+
+    Значение - строка частоты для POST-запросов или словарь
+    ``{"rate": "30/m", "methods": ("GET", "POST")}``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.view_name
+        rule = settings.RATELIMITS.get(name)
+        if rule is None:
+            return None
+        if isinstance(rule, str):
+            rule = {"rate": rule}
+        return check(
+            request, name, rule["rate"],
+            rule.get("methods", DEFAULT_METHODS),
+        )
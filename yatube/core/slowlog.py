@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+# Имя view текущего запроса для записей журнала (SlowQueryMiddleware).
+local = threading.local()
+# Планы пишутся один раз на отпечаток за жизнь процесса.
+explained = set()
+explain_lock = threading.Lock()
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r"\b\d+(\.\d+)?\b")
+PLACEHOLDER_LISTS = re.compile(r"\((\s*(%s|\?)\s*,)+\s*(%s|\?)\s*\)")
+SPACES = re.compile(r"\s+")
+
+
+def normalize(sql):
+    """SQL без значений: одинаковые по форме запросы совпадают."""
+    sql = STRINGS.sub("?", sql)
+    sql = NUMBERS.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = PLACEHOLDER_LISTS.sub("(...)", sql)
+    return SPACES.sub(" ", sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def caller():
+    """Ближайший кадр кода проекта (не Django и не библиотек)."""
+    base = str(settings.BASE_DIR) + os.sep
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if (
+            filename.startswith(base)
+            and "site-packages" not in filename
+            and not filename.endswith(os.path.join("core", "slowlog.py"))
+        ):
+            return (
+                f"{os.path.relpath(filename, base)}:{frame.lineno} "
+                f"in {frame.name}"
+            )
+    return None
+
+
+def explain(connection, sql, params):
+    # Курсор драйвера в обход обёрток Django: EXPLAIN не попадает ни
+    # в этот журнал, ни в connection.queries и assertNumQueries.
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(
+            f"{connection.ops.explain_query_prefix()} {sql}", params
+        )
+        return "\n".join(
+            " ".join(str(column) for column in row)
+            for row in cursor.fetchall()
+        )
+    except Exception as error:
+        return f"EXPLAIN недоступен: {error}"
+    finally:
+        cursor.close()
+
+
+def write_entry(entry):
+    path = settings.SLOW_QUERY_LOG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as log:
+        log.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+
+class SlowQueryWrapper:
+    """execute_wrapper: пишет в SLOW_QUERY_LOG каждый запрос дольше
+    SLOW_QUERY_THRESHOLD_MS вместе с view, кадром вызова и планом."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            if elapsed >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self.log(sql, params, many, elapsed)
+
+    def log(self, sql, params, many, elapsed):
+        key = fingerprint(sql)
+        plan = None
+        if not many and sql.lstrip()[:6].upper() == "SELECT":
+            with explain_lock:
+                fresh = key not in explained
+                explained.add(key)
+            if fresh:
+                plan = explain(self.connection, sql, params)
+        write_entry({
+            "time": timezone.now().isoformat(),
+            "fingerprint": key,
+            "ms": round(elapsed, 3),
+            "database": self.connection.alias,
+            "view": getattr(local, "view", None),
+            "caller": caller(),
+            "sql": sql,
+            "normalized": normalize(sql),
+            "plan": plan,
+        })
+
+
+def install(sender, connection, **kwargs):
+    """Приёмник connection_created: журнал подключается к каждому
+    новому соединению, в запросах и в management-командах."""
+    if not any(
+        isinstance(wrapper, SlowQueryWrapper)
+        for wrapper in connection.execute_wrappers
+    ):
+        connection.execute_wrappers.append(SlowQueryWrapper(connection))
+
+
+class SlowQueryMiddleware:
+    """Запоминает имя view для записей журнала медленных запросов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            local.view = None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        local.view = request.resolver_match.view_name
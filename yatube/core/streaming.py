@@ -0,0 +1,174 @@
+from itertools import chain
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template import loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.defaulttags import ForNode
+from django.template.loader_tags import (BLOCK_CONTEXT_KEY, BlockContext,
+                                         BlockNode, ExtendsNode, IncludeNode)
+
+FLUSH = object()
+
+
+def stream_render(request, template_name, context=None,
+                  chunk_size=None):
+    """Аналог render(), отдающий страницу по частям.
+
+    <head> и шапка сайта уходят клиенту до того, как начнётся первый
+    {% for %}, то есть до запроса постов или комментариев из БД.
+    Циклы по итераторам (``.iterator()``) не материализуются в список.
+    Ошибка посреди рендера уже не превратится в страницу 500: заголовки
+    к этому моменту отправлены.
+    """
+    # Токен, пользователь и сессия должны быть затронуты до того, как
+    # middleware обработает ответ: тело рендерится уже после них.
+    get_token(request)
+    request.user.is_authenticated
+    template = loader.get_template(template_name).template
+    context = make_context(context, request, autoescape=True)
+    chunks = iter_chunks(
+        iter_template(template, context),
+        chunk_size or settings.STREAMING_FLUSH_BYTES,
+    )
+    first = next(chunks, "")
+    return StreamingHttpResponse(chain([first], chunks))
+
+
+def iter_chunks(parts, chunk_size):
+    buffer, size = [], 0
+    for part in parts:
+        if part is FLUSH:
+            if buffer:
+                yield "".join(buffer)
+                buffer, size = [], 0
+            continue
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_template(template, context):
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            yield from iter_nodes(template.nodelist, context)
+
+
+def iter_nodes(nodelist, context):
+    for node in nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from iter_extends(node, context)
+        elif isinstance(node, BlockNode):
+            yield from iter_block(node, context)
+        elif isinstance(node, IncludeNode) and not node.isolated_context:
+            yield from iter_include(node, context)
+        elif isinstance(node, ForNode) and len(node.loopvars) == 1:
+            yield FLUSH
+            yield from iter_for(node, context)
+        else:
+            yield node.render_annotated(context)
+
+
+def iter_extends(node, context):
+    # Повторяет ExtendsNode.render, но отдаёт родителя по узлам.
+    compiled_parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in compiled_parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks({
+                    block.name: block for block in
+                    compiled_parent.nodelist.get_nodes_by_type(BlockNode)
+                })
+            break
+    with context.render_context.push_state(
+        compiled_parent, isolated_context=False
+    ):
+        yield from iter_nodes(compiled_parent.nodelist, context)
+
+
+def iter_block(node, context):
+    # Повторяет BlockNode.render.
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context["block"] = node
+            yield from iter_nodes(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context["block"] = block
+        yield from iter_nodes(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def iter_include(node, context):
+    # Повторяет IncludeNode.render, чтобы циклы внутри подключаемых
+    # шаблонов (например, комментарии) тоже отдавались по частям.
+    template = node.template.resolve(context)
+    if not callable(getattr(template, "render", None)):
+        cache = context.render_context.dicts[0].setdefault(node, {})
+        template_name = template
+        template = cache.get(template_name)
+        if template is None:
+            template = context.template.engine.get_template(template_name)
+            cache[template_name] = template
+    elif hasattr(template, "template"):
+        template = template.template
+    values = {
+        name: var.resolve(context)
+        for name, var in node.extra_context.items()
+    }
+    with context.push(**values):
+        with context.render_context.push_state(template):
+            yield from iter_nodes(template.nodelist, context)
+
+
+def iter_for(node, context):
+    # Повторяет ForNode.render для одной переменной цикла. Длина
+    # последовательности не требуется: forloop.last вычисляется заглядыванием
+    # на один элемент вперёд, revcounter доступен только если есть len().
+    parentloop = context["forloop"] if "forloop" in context else {}
+    with context.push():
+        values = node.sequence.resolve(context, ignore_failures=True)
+        if values is None:
+            values = []
+        if node.is_reversed:
+            values = list(values)[::-1]
+        length = len(values) if hasattr(values, "__len__") else None
+        iterator = iter(values)
+        sentinel = object()
+        item = next(iterator, sentinel)
+        if item is sentinel:
+            yield node.nodelist_empty.render(context)
+            return
+        loop_dict = context["forloop"] = {"parentloop": parentloop}
+        counter = 0
+        while item is not sentinel:
+            following = next(iterator, sentinel)
+            loop_dict["counter0"] = counter
+            loop_dict["counter"] = counter + 1
+            if length is not None:
+                loop_dict["revcounter"] = length - counter
+                loop_dict["revcounter0"] = length - counter - 1
+            loop_dict["first"] = counter == 0
+            loop_dict["last"] = following is sentinel
+            context[node.loopvars[0]] = item
+            for child in node.nodelist_loop:
+                yield child.render_annotated(context)
+            item = following
+            counter += 1
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.template import loader
+from django.template.base import Template
+from django.template.defaulttags import ForNode
+from django.template.loader_tags import IncludeNode
+
+
+class TemplateProfile:
+    def __init__(self):
+        self.timings = defaultdict(lambda: [0, 0.0])
+
+    def add(self, name, elapsed):
+        timing = self.timings[name]
+        timing[0] += 1
+        timing[1] += elapsed
+
+    def report(self):
+        """Строки (имя, вызовы, мс всего, мс на вызов), дорогие первыми."""
+        rows = [
+            (name, calls, total * 1000, total * 1000 / calls)
+            for name, (calls, total) in self.timings.items()
+        ]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+@contextmanager
+def profile_templates():
+    """Замеряет время каждого шаблона и каждого {% include %}.
+
+    Подменяет методы на уровне классов, но считает только шаблоны потока,
+    который вошёл в контекст. Вложенные или параллельные вызовы не
+    поддерживаются: профилировщик запросов пускает по одному.
+    """
+    profile = TemplateProfile()
+    owner = threading.get_ident()
+    template_render = Template._render
+    include_render = IncludeNode.render
+
+    def timed_template_render(self, context):
+        if threading.get_ident() != owner:
+            return template_render(self, context)
+        started = time.perf_counter()
+        try:
+            return template_render(self, context)
+        finally:
+            profile.add(self.name or "<string>", time.perf_counter() - started)
+
+    def timed_include_render(self, context):
+        if threading.get_ident() != owner:
+            return include_render(self, context)
+        started = time.perf_counter()
+        try:
+            return include_render(self, context)
+        finally:
+            profile.add(
+                "{%% include %s %%}" % include_name(self),
+                time.perf_counter() - started,
+            )
+
+    Template._render = timed_template_render
+    IncludeNode.render = timed_include_render
+    try:
+        yield profile
+    finally:
+        Template._render = template_render
+        IncludeNode.render = include_render
+
+
+def include_name(node):
+    name = getattr(node.template, "var", node.template)
+    return name if isinstance(name, str) else str(node.template.token)
+
+
+def includes_in_loops(template_name):
+    """Находит {% include %} внутри {% for %}: кандидаты на встраивание
+    или на кэширование фрагмента."""
+    template = loader.get_template(template_name).template
+    found = []
+
+    def walk(nodelist, loop):
+        for node in nodelist:
+            if isinstance(node, IncludeNode):
+                if loop is not None:
+                    found.append((template_name, include_name(node), loop))
+                continue
+            for attr in node.child_nodelists:
+                child = getattr(node, attr, None)
+                if child is None:
+                    continue
+                if isinstance(node, ForNode) and attr == "nodelist_loop":
+                    walk(child, " ".join(node.loopvars))
+                else:
+                    walk(child, loop)
+
+    walk(template.nodelist, None)
+    return found
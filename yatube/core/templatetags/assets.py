@@ -0,0 +1,42 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+VENDOR_BUNDLE = "js/vendor.bundle.js"
+
+
+@lru_cache(maxsize=None)
+def bundle_url():
+    """Адрес склеенных скриптов или None, если vendor_assets ещё не
+    запускали (или collectstatic собрал статику без них).
+
+    Поиск по каталогам статики выполняется один раз на процесс: тег
+    стоит в base.html, то есть на каждой странице. Статика меняется
+    только с выкладкой, вместе с перезапуском воркеров."""
+    if finders.find(VENDOR_BUNDLE) is None:
+        return None
+    try:
+        return staticfiles_storage.url(VENDOR_BUNDLE)
+    except ValueError:
+        return None
+
+
+@register.simple_tag
+def vendor_scripts():
+    """Сторонние скрипты: локальный бандл, а без него - те же файлы
+    с CDN с проверкой integrity."""
+    url = bundle_url()
+    if url is not None:
+        return format_html('<script defer src="{}"></script>', url)
+    return format_html_join(
+        "\n",
+        '<script defer src="{}" integrity="{}" '
+        'crossorigin="anonymous"></script>',
+        settings.VENDOR_ASSETS,
+    )
@@ -0,0 +1,12 @@
+from django import template
+
+from ..images import image_url as make_image_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_url(image, size, fmt="jpeg"):
+    """{% image_url post.image "700x350" %} - адрес обрезанной копии."""
+    width, height = (int(part) for part in size.split("x"))
+    return make_image_url(image.name, width, height, fmt)
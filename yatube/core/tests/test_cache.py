@@ -0,0 +1,88 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from posts.models import Group
+
+from ..cache import fresh, get_or_compute
+
+User = get_user_model()
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_single_flight(self):
+        """При пустом кэше значение считает один поток из многих."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    get_or_compute("key", compute, 60)[0]
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 8)
+
+    def test_serves_stale_while_revalidating(self):
+        """Пока другой процесс пересчитывает, отдаётся прежнее значение,
+        а без блокировки истёкшее значение пересчитывается."""
+        cache.set("key", ("old", time.time() - 1, 0), 60)
+        cache.add("key:lock", "other", 60)
+        self.assertEqual(get_or_compute("key", lambda: "new", 60)[0], "old")
+        cache.delete("key:lock")
+        self.assertEqual(get_or_compute("key", lambda: "new", 60)[0], "new")
+        self.assertEqual(get_or_compute("key", lambda: "newer", 60)[0], "new")
+
+    def test_early_expiration(self):
+        """Долго считаемое значение обновляется до срока, а с beta=0 - нет."""
+        now = time.time()
+        with mock.patch("random.random", return_value=0.99):
+            self.assertFalse(fresh(now + 5, 2, now, beta=1))
+            self.assertTrue(fresh(now + 5, 2, now, beta=0))
+        self.assertTrue(fresh(now + 60, 0.01, now, beta=1))
+
+
+class CachedViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="User")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_per_user(self):
+        """Страница авторизованного пользователя не достаётся другим."""
+        self.client.force_login(self.user)
+        authorized = self.client.get(reverse("posts:index"))
+        self.assertIn("max-age=20", authorized["Cache-Control"])
+        self.client.logout()
+        anonymous = self.client.get(reverse("posts:index"))
+        self.assertNotIn(self.user.username, anonymous.content.decode())
+        with self.assertNumQueries(0):
+            self.client.get(reverse("posts:index"))
+
+    def test_errors_not_cached(self):
+        """Ответы кроме 200 не кэшируются."""
+        url = reverse("posts:feed_fragment", args=["group", "slug"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        Group.objects.create(title="Группа", slug="slug")
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,60 @@
+import gzip
+from unittest import mock
+
+import brotli
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import compression
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("posts:index")
+
+    def test_negotiates_encoding(self):
+        """br предпочтительнее gzip, q=0 исключает кодировку."""
+        plain = self.client.get(self.url)
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+        cases = {
+            "gzip, deflate, br": ("br", brotli.decompress),
+            "gzip, br;q=0": ("gzip", gzip.decompress),
+        }
+        for header, (encoding, decompress) in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get(
+                    self.url, HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertEqual(
+                    decompress(response.content), plain.content
+                )
+
+    def test_skips_small_bodies(self):
+        """Короткие ответы уходят как есть."""
+        with self.settings(COMPRESSION_MIN_LENGTH=10 ** 6):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_skips_pages_with_csrf_token(self):
+        """Страница с формой и CSRF-токеном не сжимается (BREACH)."""
+        response = self.client.get(
+            reverse("users:login"), HTTP_ACCEPT_ENCODING="br"
+        )
+        self.assertContains(response, "csrfmiddlewaretoken")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_cached_page_compressed_once(self):
+        """Повторный ответ из кэша страницы не сжимается заново."""
+        with mock.patch.object(
+            compression, "compress", wraps=compression.compress
+        ) as compress:
+            for _ in range(3):
+                response = self.client.get(
+                    self.url, HTTP_ACCEPT_ENCODING="br"
+                )
+                self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compress.call_count, 1)
@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+import threading
+from concurrent import futures
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .. import images
+from ..images import get_image, image_url
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_CACHE_DIR = os.path.join(TEMP_MEDIA_ROOT, "image_cache")
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_CACHE_DIR=TEMP_CACHE_DIR,
+    IMAGE_WORKERS=0,
+)
+class ImageEndpointTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+        images.cache_size = None
+        content = BytesIO()
+        Image.new("RGB", (40, 20), "red").save(content, "PNG")
+        self.name = default_storage.save(
+            "posts/red.png", ContentFile(content.getvalue())
+        )
+
+    def get(self, url):
+        response = self.client.get(url)
+        return response, b"".join(response.streaming_content)
+
+    def test_resize_and_cache(self):
+        """Копия нужного размера и формата создаётся один раз и отдаётся
+        из дискового кэша."""
+        url = image_url(self.name, 10, 10, "webp")
+        response, content = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("immutable", response["Cache-Control"])
+        with Image.open(BytesIO(content)) as image:
+            self.assertEqual(image.size, (10, 10))
+        path = get_image(self.name, 10, 10, "webp")
+        os.utime(path, (0, 0))
+        self.assertEqual(self.get(url)[1], content)
+        self.assertGreater(os.stat(path).st_mtime, 0)
+
+    def test_signature_required(self):
+        """Чужой размер или формат с тем же токеном не принимается."""
+        url = image_url(self.name, 10, 10)
+        forged = url.replace("10x10", "2000x2000")
+        self.assertEqual(self.client.get(forged).status_code, 404)
+        url = image_url(self.name, 10, 10, "gif")
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_lru_eviction(self):
+        """Сверх предела удаляются давно не запрошенные копии."""
+        old = get_image(self.name, 10, 10, "png")
+        os.utime(old, (0, 0))
+        other = default_storage.save(
+            "posts/red.png", default_storage.open(self.name)
+        )
+        limit = os.path.getsize(old) * 2 - 1
+        with self.settings(IMAGE_CACHE_MAX_BYTES=limit):
+            new = get_image(other, 10, 10, "png")
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+
+    @override_settings(IMAGE_WORKERS=1)
+    def test_process_pool(self):
+        """С IMAGE_WORKERS копии строятся в пуле процессов."""
+        response, content = self.get(image_url(self.name, 8, 4, "jpeg"))
+        with Image.open(BytesIO(content)) as image:
+            self.assertEqual((image.format, image.size), ("JPEG", (8, 4)))
+
+    def test_decompression_bomb(self):
+        """Слишком большая по числу пикселей картинка - 404, а не 500."""
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 100):
+            response = self.client.get(image_url(self.name, 10, 10))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(IMAGE_WORKERS=1)
+    def test_broken_pool_replaced(self):
+        """Пул с упавшим воркером заменяется новым."""
+        broken = images.get_pool()
+        broken.submit(os._exit, 1).exception()
+        response, content = self.get(image_url(self.name, 8, 4))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNot(images.pool, broken)
+
+    def hung_future(self):
+        """Задание, ожидание которого истекает: result() бросает
+        concurrent.futures.TimeoutError (до Python 3.11 - не встроенный
+        TimeoutError)."""
+        images.get_pool()
+        self.addCleanup(setattr, images, "slots", images.slots)
+        images.slots = threading.BoundedSemaphore(1)
+
+        class Future:
+            cancelled = False
+
+            def add_done_callback(self, callback):
+                self.callback = callback
+
+            def result(self, timeout):
+                raise futures.TimeoutError
+
+            def cancel(self):
+                self.cancelled = True
+                return False
+
+        future = Future()
+        return future, mock.patch.object(
+            images, "submit", return_value=(images.pool, future)
+        )
+
+    @override_settings(IMAGE_WORKERS=1, IMAGE_TIMEOUT=0.1)
+    def test_slot_held_until_job_finishes(self):
+        """После таймаута ожидания задание отменяется, а место в очереди
+        занято, пока оно не завершится."""
+        future, patch = self.hung_future()
+        with patch:
+            with self.assertRaises(images.ImageBusy):
+                images.run_resize("source", "target", 8, 4, "jpeg", 85)
+        self.assertTrue(future.cancelled)
+        self.assertFalse(images.slots.acquire(blocking=False))
+        future.callback(future)
+        self.assertTrue(images.slots.acquire(blocking=False))
+
+    @override_settings(IMAGE_WORKERS=1, IMAGE_TIMEOUT=0.1)
+    def test_timeout_returns_503(self):
+        """Не дождавшись пула, endpoint отвечает 503 с Retry-After."""
+        future, patch = self.hung_future()
+        with patch:
+            response = self.client.get(image_url(self.name, 8, 4))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
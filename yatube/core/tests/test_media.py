@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def staff_only_private(request, path):
+    return not path.startswith("private/") or request.user.is_staff
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in (
+            "posts/file.txt", "private/file.txt", "posts/котик_1.jpg",
+        ):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as out:
+                out.write(b"0123456789")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.url = settings.MEDIA_URL + "posts/file.txt"
+
+    def test_full_file_and_etag(self):
+        """Файл отдаётся целиком, повтор с ETag получает 304."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        cached = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_ranges(self):
+        """Диапазоны байтов: обычный, открытый, с конца и вне файла."""
+        cases = {
+            "bytes=2-5": (206, b"2345", "bytes 2-5/10"),
+            "bytes=7-": (206, b"789", "bytes 7-9/10"),
+            "bytes=-3": (206, b"789", "bytes 7-9/10"),
+            "bytes=20-": (416, b"", "bytes */10"),
+        }
+        for header, (status, content, content_range) in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(response["Content-Range"], content_range)
+                body = (
+                    b"".join(response.streaming_content)
+                    if response.streaming else response.content
+                )
+                self.assertEqual(body, content)
+        stale = self.client.get(
+            self.url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(stale.status_code, 200)
+
+    def test_missing_and_traversal(self):
+        """Несуществующие файлы и пути за пределами MEDIA_ROOT - 404."""
+        for path in ("posts/missing.txt", "../manage.py", "posts"):
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_ACCEL="x-accel")
+    def test_accel_redirect(self):
+        """С MEDIA_ACCEL файл передаётся фронтенд-серверу."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/posts/file.txt"
+        )
+        self.assertEqual(response.content, b"")
+
+    def test_accel_non_ascii_name(self):
+        """Кириллица в имени файла уходит в заголовок %-кодированной."""
+        url = settings.MEDIA_URL + "posts/котик_1.jpg"
+        quoted = "posts/%D0%BA%D0%BE%D1%82%D0%B8%D0%BA_1.jpg"
+        with self.settings(MEDIA_ACCEL="x-accel"):
+            response = self.client.get(url)
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/" + quoted
+        )
+        with self.settings(MEDIA_ACCEL="x-sendfile"):
+            response = self.client.get(url)
+        self.assertTrue(response["X-Sendfile"].endswith("/" + quoted))
+        self.assertNotIn("=?utf-8?", response.serialize_headers().decode())
+
+    @override_settings(
+        MEDIA_ACCESS_CHECKS=[f"{__name__}.staff_only_private"]
+    )
+    def test_access_checks(self):
+        """Проверки доступа закрывают приватные файлы."""
+        url = settings.MEDIA_URL + "private/file.txt"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..log import JSONFormatter
+from ..metrics import registry
+
+
+@override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"])
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.url = reverse("core:metrics")
+
+    def test_prometheus_export(self):
+        """/metrics отдаёт счётчики, гистограммы и попадания в кэш
+        по имени маршрута."""
+        index = reverse("posts:index")
+        self.client.get(index)
+        self.client.get(index)
+        text = self.client.get(self.url).content.decode()
+        self.assertIn(
+            'yatube_requests_total{route="posts:index",method="GET",'
+            'status="200"} 2', text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{route="posts:index",'
+            'le="+Inf"} 2', text
+        )
+        self.assertIn('yatube_db_queries_total{route="posts:index"}', text)
+        self.assertIn('yatube_cache_requests_total{result="hit"}', text)
+
+    def test_aggregates_worker_snapshots(self):
+        """Снимки других процессов из METRICS_DIR складываются."""
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "1.json"), "w") as snapshot:
+                json.dump({
+                    "requests": [["posts:index", "GET", 200, 5]],
+                    "latency": {}, "db_time": {}, "db_queries": {},
+                    "cache": {"miss": 3},
+                }, snapshot)
+            with self.settings(METRICS_DIR=directory):
+                self.client.get(reverse("posts:index"))
+                text = self.client.get(self.url).content.decode()
+        self.assertIn(
+            'yatube_requests_total{route="posts:index",method="GET",'
+            'status="200"} 6', text
+        )
+
+    def test_unknown_methods_grouped(self):
+        """Произвольный метод клиента, в том числе с "|", попадает в
+        метку "other" и не ломает /metrics, как и старые снимки с таким
+        ключом."""
+        self.client.generic("X|Y", reverse("posts:index"))
+        self.client.generic("PROPFIND", reverse("posts:index"))
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "1.json"), "w") as snapshot:
+                json.dump({
+                    "requests": {
+                        "posts:index|GET|200": 1,
+                        "posts:index|X|Y|405": 1,
+                    },
+                    "latency": {}, "db_time": {}, "db_queries": {},
+                    "cache": {},
+                }, snapshot)
+            with self.settings(METRICS_DIR=directory):
+                response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_requests_total{route="posts:index",method="other",'
+            'status="200"} 2', text
+        )
+        self.assertIn(
+            'yatube_requests_total{route="posts:index",method="GET",'
+            'status="200"} 1', text
+        )
+        self.assertNotIn("X|Y", text)
+
+    def test_hidden_from_other_addresses(self):
+        """Посторонним адресам страница не видна."""
+        response = self.client.get(self.url, REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 404)
+        with self.settings(METRICS_ALLOWED_IPS=[]):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_snapshot_name_survives_pid_reuse(self):
+        """Новый процесс с тем же pid пишет снимок в другой файл."""
+        name = registry.snapshot_name()
+        self.assertTrue(name.startswith(f"{os.getpid()}-"))
+        self.assertEqual(registry.snapshot_name(), name)
+        registry.pid = None
+        self.assertNotEqual(registry.snapshot_name(), name)
+
+    def test_json_access_log(self):
+        """Каждый запрос пишет строку JSON с маршрутом и временем."""
+        with self.assertLogs("yatube.access") as logs:
+            self.client.get(reverse("posts:index"))
+        entry = json.loads(JSONFormatter().format(logs.records[0]))
+        self.assertEqual(entry["route"], "posts:index")
+        self.assertEqual(entry["status"], 200)
+        self.assertIn("duration_ms", entry)
+        self.assertIn("db_queries", entry)
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from posts.models import Post
+
+from ..paginator import ApproximateCountPaginator
+
+User = get_user_model()
+
+
+@override_settings(PAGINATOR_EXACT_COUNT_LIMIT=5)
+class ApproximateCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="User")
+
+    def setUp(self):
+        cache.clear()
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(text="Текст", author=self.user) for _ in range(count)
+        )
+
+    def test_exact_below_limit(self):
+        """До порога счёт точный."""
+        self.create_posts(4)
+        paginator = ApproximateCountPaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, 4)
+        self.assertEqual(paginator.display_count, 4)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_capped_and_cached_above_limit(self):
+        """Выше порога счёт кэшируется, а показывается как "5+"."""
+        self.create_posts(8)
+        paginator = ApproximateCountPaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, 8)
+        self.assertEqual(paginator.display_count, "5+")
+        self.create_posts(2)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                ApproximateCountPaginator(Post.objects.all(), 2).count, 8
+            )
@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username="staff", is_staff=True)
+        cls.user = User.objects.create_user(username="user")
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.settings_override = override_settings(
+            PROFILER_ENABLED=True,
+            PROFILER_TOKEN="secret",
+            PROFILER_DIR=self.directory,
+            PROFILER_INTERVAL=0.0005,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.url = reverse("posts:profile", args=[self.user.username])
+
+    def test_header_triggers_profile(self):
+        """Запрос с верным X-Profile сохраняет стеки, SQL и шаблоны."""
+        response = self.client.get(self.url, HTTP_X_PROFILE="secret")
+        name = response["X-Profile-Id"]
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, f"{name}.folded"))
+        )
+        self.client.force_login(self.staff)
+        detail = self.client.get(reverse("core:profile_detail", args=[name]))
+        profile = detail.context["profile"]
+        self.assertEqual(profile["route"], "posts:profile")
+        self.assertGreater(profile["query_count"], 0)
+        self.assertIn(
+            "posts/profile.html", [row[0] for row in profile["templates"]]
+        )
+        listing = self.client.get(reverse("core:profiles"))
+        self.assertEqual(
+            [item["name"] for item in listing.context["profiles"]], [name]
+        )
+
+    def test_not_profiled_without_trigger(self):
+        """Без заголовка, флага staff и выборки профиль не пишется."""
+        responses = [
+            self.client.get(self.url),
+            self.client.get(self.url, HTTP_X_PROFILE="wrong"),
+            self.client.get(self.url, {"_profile": 1}),
+        ]
+        for response in responses:
+            self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_staff_flag(self):
+        """Staff профилирует запрос параметром ?_profile."""
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {"_profile": 1})
+        self.assertIn("X-Profile-Id", response)
+
+    def test_pages_are_staff_only(self):
+        """Страницы профилей закрыты для обычных пользователей."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("core:profiles"))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,138 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Follow, Post
+
+from .. import pubsub
+from ..pubsub import Hub, HubFull
+
+User = get_user_model()
+
+
+class HubTests(SimpleTestCase):
+    def test_publish_reaches_channel_subscribers(self):
+        """Событие получают только подписчики канала."""
+        hub = Hub()
+        subscription = hub.subscribe(["post:1"])
+        other = hub.subscribe(["post:2"])
+        hub.publish("post:1", "comment", {"id": 1})
+        self.assertEqual(subscription.get(0), ("comment", {"id": 1}))
+        self.assertIsNone(other.get(0))
+
+    def test_connection_limit(self):
+        """Сверх лимита подключений подписка отклоняется."""
+        hub = Hub(max_connections=1)
+        subscription = hub.subscribe(["post:1"])
+        with self.assertRaises(HubFull):
+            hub.subscribe(["post:1"])
+        subscription.close()
+        subscription.close()
+        hub.subscribe(["post:1"])
+
+    def test_overflow_closes_stream(self):
+        """Переполненная очередь медленного клиента завершает поток."""
+        hub = Hub(queue_size=1)
+        subscription = hub.subscribe(["post:1"])
+        for number in range(2):
+            hub.publish("post:1", "comment", {"id": number})
+        self.assertTrue(subscription.overflowed)
+        stream = pubsub.event_stream(subscription, keepalive=0.01)
+        self.assertEqual(list(stream), ["retry: 3000\n\n"])
+        self.assertEqual(hub.connections, 0)
+
+    def test_shared_cache_backend(self):
+        """Через общий кэш событие доставляется опросом."""
+        cache.clear()
+        hub = Hub(cache_alias="default", poll_interval=3600)
+        subscription = hub.subscribe(["author:1"])
+        hub.publish("author:1", "post", {"id": 5})
+        self.assertIsNone(subscription.get(0))
+        hub.poll_once(dict(hub.cursors))
+        self.assertEqual(subscription.get(0), ("post", {"id": 5}))
+        subscription.close()
+
+
+@override_settings(LIVE_COMMENTS=True)
+class EventViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="User")
+        cls.post = Post.objects.create(text="Текст", author=cls.user)
+
+    def test_new_comment_is_streamed(self):
+        """Новый комментарий приходит в поток событий поста."""
+        hub = Hub()
+        with mock.patch.object(pubsub, "hub", hub):
+            response = self.client.get(
+                reverse("posts:comment_events", args=[self.post.pk])
+            )
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            self.client.force_login(self.user)
+            self.client.post(
+                reverse("posts:add_comment", args=[self.post.pk]),
+                {"text": "Комментарий"},
+            )
+            stream = iter(response.streaming_content)
+            next(stream)
+            event = next(stream).decode()
+            response.close()
+        self.assertTrue(event.startswith("event: comment\n"))
+        data = json.loads(event.split("data: ", 1)[1])
+        self.assertEqual(data["text"], "Комментарий")
+        self.assertEqual(hub.connections, 0)
+
+    def test_followed_author_post_is_streamed(self):
+        """Новый пост автора приходит в поток событий его подписчиков."""
+        follower = User.objects.create_user(username="Follower")
+        Follow.objects.create(user=follower, author=self.user)
+        hub = Hub()
+        with mock.patch.object(pubsub, "hub", hub):
+            self.client.force_login(follower)
+            page = self.client.get(reverse("posts:follow_index"))
+            self.assertContains(page, reverse("posts:follow_events"))
+            response = self.client.get(reverse("posts:follow_events"))
+            author = Client()
+            author.force_login(self.user)
+            author.post(reverse("posts:post_create"), {"text": "Новый пост"})
+            stream = iter(response.streaming_content)
+            next(stream)
+            event = next(stream).decode()
+            response.close()
+        self.assertTrue(event.startswith("event: post\n"))
+        data = json.loads(event.split("data: ", 1)[1])
+        self.assertEqual(data["text"], "Новый пост")
+        post = Post.objects.get(text="Новый пост")
+        self.assertEqual(
+            data["url"], reverse("posts:post_detail", args=[post.pk])
+        )
+        self.assertEqual(hub.connections, 0)
+
+    def test_unread_stream_releases_subscription(self):
+        """Закрытый без чтения ответ освобождает место в хабе."""
+        hub = Hub(max_connections=1)
+        url = reverse("posts:comment_events", args=[self.post.pk])
+        with mock.patch.object(pubsub, "hub", hub):
+            self.client.get(url).close()
+            self.assertEqual(hub.connections, 0)
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(LIVE_COMMENTS=False)
+    def test_disabled_by_default(self):
+        """Без LIVE_COMMENTS страница поста не открывает поток событий."""
+        response = self.client.get(
+            reverse("posts:post_detail", args=[self.post.pk])
+        )
+        self.assertNotContains(response, "EventSource")
+        response = self.client.get(
+            reverse("posts:comment_events", args=[self.post.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertNotContains(response, "EventSource")
+        response = self.client.get(reverse("posts:follow_events"))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+from posts.models import Comment, Post
+
+from ..ratelimit import client_ip, consume
+
+User = get_user_model()
+
+
+class WindowCounterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_window_resets(self):
+        """Окно пропускает count запросов, следующее начинается заново."""
+        self.assertEqual(consume("key", "2/m", now=0), 0)
+        self.assertEqual(consume("key", "2/m", now=10), 0)
+        self.assertEqual(consume("key", "2/m", now=30), 30)
+        self.assertEqual(consume("other", "2/m", now=30), 0)
+        self.assertEqual(consume("key", "2/m", now=60), 0)
+
+    def test_window_boundary_burst(self):
+        """Окно фиксированное: на стыке окон проходит до 2 * count."""
+        results = [consume("key", "2/m", now=59) for _ in range(3)]
+        results += [consume("key", "2/m", now=60) for _ in range(3)]
+        self.assertEqual(results, [0, 0, 1, 0, 0, 60])
+
+    def test_concurrent_requests_counted(self):
+        """Одновременные запросы из разных потоков не теряются."""
+        barrier = threading.Barrier(8)
+
+        def request():
+            barrier.wait()
+            return consume("key", "4/m", now=0)
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: request(), range(8)))
+        self.assertEqual(results.count(0), 4)
+
+
+class ClientIpTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get(
+            "/", REMOTE_ADDR="10.0.0.1",
+            HTTP_X_FORWARDED_FOR="1.1.1.1, 2.2.2.2, 3.3.3.3",
+        )
+
+    def test_remote_addr_by_default(self):
+        """Без настройки заголовок клиента не учитывается."""
+        self.assertEqual(client_ip(self.request), "10.0.0.1")
+
+    @override_settings(
+        RATELIMIT_IP_HEADER="HTTP_X_FORWARDED_FOR",
+        RATELIMIT_TRUSTED_PROXIES=2,
+    )
+    def test_trusted_proxy_header(self):
+        """Адрес берётся из записи ближайшего недоверенного звена."""
+        self.assertEqual(client_ip(self.request), "2.2.2.2")
+
+
+@override_settings(RATELIMITS={"posts:add_comment": "2/m"})
+class RateLimitMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="User")
+        cls.post = Post.objects.create(text="Текст", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_write_endpoint_returns_429(self):
+        """Сверх лимита комментарий не создаётся, ответ 429."""
+        url = reverse("posts:add_comment", args=[self.post.pk])
+        for _ in range(2):
+            response = self.client.post(url, {"text": "Комментарий"})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.client.post(url, {"text": "Комментарий"})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(Comment.objects.count(), 2)
+        response = self.client.get(
+            reverse("posts:post_detail", args=[self.post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
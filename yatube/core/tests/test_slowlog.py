@@ -0,0 +1,53 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import slowlog
+
+User = get_user_model()
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        slowlog.explained.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "slow.jsonl")
+        self.user = User.objects.create_user(username="author")
+
+    def test_normalize(self):
+        """Значения и списки параметров не различают отпечатки."""
+        self.assertEqual(
+            slowlog.fingerprint(
+                "SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s) LIMIT 10"
+            ),
+            slowlog.fingerprint(
+                "SELECT * FROM t WHERE a = 'y' AND b IN (%s, %s, %s) LIMIT 20"
+            ),
+        )
+
+    def test_logs_view_caller_and_plan(self):
+        """Медленные запросы попадают в журнал с view и планом, команда
+        группирует их по отпечатку."""
+        with self.settings(
+            SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG=self.path
+        ):
+            with self.assertNumQueries(3):
+                self.client.get(
+                    reverse("posts:profile", args=[self.user.username])
+                )
+        out = StringIO()
+        call_command("slow_queries", path=self.path, top=20, stdout=out)
+        report = out.getvalue()
+        self.assertIn("view posts:profile", report)
+        self.assertIn("posts/views.py", report)
+        self.assertIn('FROM "auth_user" WHERE "auth_user"."username" = ?',
+                      report)
+        self.assertIn("| ", report)
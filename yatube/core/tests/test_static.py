@@ -0,0 +1,102 @@
+import base64
+import hashlib
+import os
+import pathlib
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from ..templatetags.assets import bundle_url
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = os.path.join(directory.name, "static")
+        self.root = os.path.join(directory.name, "staticfiles")
+        os.makedirs(os.path.join(self.source, "css"))
+        with open(os.path.join(self.source, "css", "site.css"), "w") as css:
+            css.write("body { margin: 0; }\n" * 500)
+
+    def test_collectstatic_report(self):
+        """collectstatic кладёт хэшированные и сжатые копии и печатает
+        отчёт о размерах."""
+        out = StringIO()
+        with override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_FINDERS=[
+                "django.contrib.staticfiles.finders.FileSystemFinder",
+            ],
+            STATICFILES_STORAGE=(
+                "whitenoise.storage.CompressedManifestStaticFilesStorage"
+            ),
+        ):
+            with self.assertRaisesMessage(CommandError, "vendor_assets"):
+                call_command("collectstatic", interactive=False, stdout=out)
+            call_command(
+                "collectstatic", interactive=False, allow_cdn_scripts=True,
+                stdout=out,
+            )
+        hashed = [
+            path.name for path in pathlib.Path(self.root, "css").iterdir()
+            if path.name.startswith("site.") and path.suffix == ".br"
+        ]
+        self.assertEqual(len(hashed), 2)
+        self.assertIn("css/site.", out.getvalue())
+        self.assertIn("Всего файлов: 1", out.getvalue())
+
+    def test_vendor_assets_checks_integrity(self):
+        """vendor_assets склеивает скрипты и отказывается от файла
+        с неверным integrity."""
+        script = os.path.join(self.source, "lib.js")
+        with open(script, "wb") as lib:
+            lib.write(b"var lib = 1;\n//# sourceMappingURL=lib.js.map\n")
+        with open(script, "rb") as lib:
+            digest = hashlib.sha384(lib.read()).digest()
+        url = pathlib.Path(script).as_uri()
+        integrity = "sha384-" + base64.b64encode(digest).decode()
+        with override_settings(VENDOR_ASSETS=[(url, integrity)] * 2):
+            call_command(
+                "vendor_assets", output_dir=self.source, stdout=StringIO()
+            )
+        with open(os.path.join(self.source, "js", "vendor.bundle.js")) as js:
+            self.assertEqual(js.read(), "var lib = 1;\n;\n" * 2)
+        with override_settings(VENDOR_ASSETS=[(url, "sha384-AAAA")]):
+            with self.assertRaises(CommandError):
+                call_command(
+                    "vendor_assets", output_dir=self.source,
+                    stdout=StringIO(),
+                )
+
+    def test_vendor_scripts_fallback(self):
+        """Без бандла base.html подключает скрипты с CDN с integrity.
+        Статика ищется один раз на процесс."""
+        bundle_url.cache_clear()
+        self.addCleanup(bundle_url.cache_clear)
+        template = Template("{% load assets %}{% vendor_scripts %}")
+        with override_settings(STATICFILES_DIRS=[self.source]):
+            with mock.patch.object(
+                finders, "find", wraps=finders.find
+            ) as find:
+                html = template.render(Context())
+                template.render(Context())
+            self.assertEqual(find.call_count, 1)
+            self.assertIn('integrity="sha384-', html)
+            os.makedirs(os.path.join(self.source, "js"))
+            bundle = os.path.join(self.source, "js", "vendor.bundle.js")
+            open(bundle, "w").close()
+            bundle_url.cache_clear()
+            html = template.render(Context())
+        self.assertEqual(
+            html,
+            f'<script defer src="{settings.STATIC_URL}js/vendor.bundle.js">'
+            '</script>',
+        )
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class StreamingRenderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="User")
+        cls.group = Group.objects.create(
+            title="Заголовок",
+            slug="slug",
+            description="Описание",
+        )
+        cls.post = Post.objects.create(
+            text="Текст",
+            author=cls.user,
+            group=cls.group,
+        )
+        for number in range(5):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f"Комментарий {number}"
+            )
+
+    def test_streamed_pages_match_render(self):
+        """Потоковый рендер отдаёт ту же страницу, что и render()."""
+        urls = [
+            reverse("posts:post_detail", args=[self.post.pk]),
+            reverse("posts:profile", args=[self.user.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                expected = self.client.get(url).content
+                with override_settings(
+                    STREAM_RESPONSES=True, STREAMING_FLUSH_BYTES=256
+                ):
+                    response = self.client.get(url)
+                self.assertIsInstance(response, StreamingHttpResponse)
+                chunks = list(response.streaming_content)
+                self.assertGreater(len(chunks), 1)
+                self.assertEqual(b"".join(chunks), expected)
@@ -0,0 +1,24 @@
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase
+
+from ..template_profiling import includes_in_loops, profile_templates
+
+
+class TemplateProfilingTests(SimpleTestCase):
+    def test_profile_counts_templates_and_includes(self):
+        """Профилировщик считает рендеры шаблонов и {% include %}."""
+        with profile_templates() as profile:
+            render_to_string("posts/includes/feed_fragment.html", {
+                "posts": [],
+            })
+        names = [row[0] for row in profile.report()]
+        self.assertIn("posts/includes/feed_fragment.html", names)
+
+    def test_includes_in_loops(self):
+        """Include карточки поста внутри цикла ленты обнаруживается."""
+        found = includes_in_loops("posts/index.html")
+        self.assertIn(
+            ("posts/index.html", "posts/includes/post_item.html", "post"),
+            found,
+        )
+        self.assertEqual(includes_in_loops("posts/post_detail.html"), [])
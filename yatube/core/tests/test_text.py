@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase
+
+from ..text import sanitize_html
+
+
+class SanitizeHtmlTests(SimpleTestCase):
+    def test_keeps_markdown_markup(self):
+        """Разметка Markdown и безопасные ссылки остаются как есть."""
+        html = (
+            '<p><strong>Жирный</strong> и <a href="https://example.com/?a=1'
+            '&amp;b=2" title="Пример">ссылка</a></p>\n'
+            '<pre><code class="language-python">x &lt; 1\n</code></pre>'
+            '<ol start="3"><li>пункт<br /></li></ol>'
+        )
+        self.assertEqual(sanitize_html(html), html.replace("<br />", "<br>"))
+
+    def test_drops_unsafe_tags_and_attributes(self):
+        """Обработчики событий, style, src и чужие схемы ссылок
+        отбрасываются, текст чужих тегов остаётся экранированным."""
+        cases = {
+            '<p onclick="alert(1)" style="color:red">Текст</p>':
+                "<p>Текст</p>",
+            '<img src="x" onerror="alert(1)">': "",
+            '<a href="javascript:alert(1)">ссылка</a>': "<a>ссылка</a>",
+            '<a href="//evil.example/">ссылка</a>': "<a>ссылка</a>",
+            "<script>alert(1)</script>": "alert(1)",
+            '<code class="x onmouseover">код</code>': "<code>код</code>",
+            "<p>&lt;b&gt;</p>": "<p>&lt;b&gt;</p>",
+        }
+        for html, expected in cases.items():
+            with self.subTest(html=html):
+                self.assertEqual(sanitize_html(html), expected)
@@ -0,0 +1,93 @@
+import re
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.template.defaultfilters import linebreaksbr, urlizetrunc
+from django.utils.html import escape
+
+# Разметка, которую Markdown может выдать для текста поста, и разрешённые
+# атрибуты каждого тега. Всё остальное отбрасывается, текст остаётся.
+ALLOWED_TAGS = {
+    "a": {"href", "title"},
+    "blockquote": set(),
+    "br": set(),
+    "code": {"class"},
+    "em": set(),
+    "h1": set(), "h2": set(), "h3": set(),
+    "h4": set(), "h5": set(), "h6": set(),
+    "hr": set(),
+    "li": set(),
+    "ol": {"start"},
+    "p": set(),
+    "pre": set(),
+    "strong": set(),
+    "ul": set(),
+}
+VOID_TAGS = {"br", "hr"}
+# Значения атрибутов: ссылки только на http(s), mailto и пути сайта.
+ALLOWED_VALUES = {
+    "href": re.compile(r"^(https?://|mailto:|/(?!/))", re.I),
+    "class": re.compile(r"^language-[\w+-]+$"),
+    "start": re.compile(r"^\d+$"),
+}
+
+
+class Sanitizer(HTMLParser):
+    """Пересобирает HTML по белому списку ALLOWED_TAGS: чужие теги
+    и атрибуты (on*, style, src...) отбрасываются, текст экранируется
+    заново."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ALLOWED_TAGS:
+            return
+        kept = "".join(
+            f' {name}="{escape(value)}"'
+            for name, value in attrs
+            if name in ALLOWED_TAGS[tag] and value is not None and (
+                name not in ALLOWED_VALUES
+                or ALLOWED_VALUES[name].match(value)
+            )
+        )
+        self.parts.append(f"<{tag}{kept}>")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in ALLOWED_TAGS and tag not in VOID_TAGS:
+            self.parts.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        self.parts.append(escape(data))
+
+
+def sanitize_html(html):
+    sanitizer = Sanitizer()
+    sanitizer.feed(html)
+    sanitizer.close()
+    return "".join(sanitizer.parts)
+
+
+def render_text(text):
+    """HTML текста поста или комментария.
+
+    По умолчанию то же, что фильтры linebreaksbr|urlizetrunc в шаблоне.
+    С TEXT_MARKDOWN - Markdown поверх экранированного текста, а результат
+    проходит через sanitize_html: в разметку, которая выводится |safe,
+    попадают только теги и атрибуты из ALLOWED_TAGS.
+    """
+    if settings.TEXT_MARKDOWN:
+        import markdown
+
+        return sanitize_html(markdown.markdown(
+            escape(text), extensions=settings.TEXT_MARKDOWN_EXTENSIONS
+        ))
+    return urlizetrunc(
+        linebreaksbr(text, autoescape=True),
+        settings.TEXT_URLIZE_LIMIT,
+        autoescape=True,
+    )
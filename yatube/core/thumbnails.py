@@ -0,0 +1,31 @@
+from django.core.cache import caches
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.kvstores.base import KVStoreBase
+
+
+class KVStore(KVStoreBase):
+    """Хранилище метаданных sorl.thumbnail только в кэше THUMBNAIL_CACHE.
+
+    Стандартный cached_db при промахе кэша читает таблицу
+    thumbnail_kvstore в основной базе и пишет в неё каждую новую
+    миниатюру. Здесь база не используется: потерянная запись
+    восстанавливается по файлу миниатюры в хранилище. Кэш не умеет
+    перечислять ключи, поэтому thumbnail cleanup и clear ничего не
+    находят - устаревшие файлы удаляются вместе с картинками.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THUMBNAIL_CACHE]
+
+    def _get_raw(self, key):
+        return self.cache.get(key)
+
+    def _set_raw(self, key, value):
+        self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+
+    def _delete_raw(self, *keys):
+        self.cache.delete_many(keys)
+
+    def _find_keys_raw(self, prefix):
+        return []
@@ -0,0 +1,25 @@
+from django.urls import path
+
+from . import views
+
+app_name = "core"
+
+urlpatterns = [
+    path("metrics", views.metrics, name="metrics"),
+    path("profiles/", views.profiles, name="profiles"),
+    path(
+        "profiles/<str:name>/",
+        views.profile_detail,
+        name="profile_detail"
+    ),
+    path(
+        "profiles/<str:name>/folded/",
+        views.profile_stacks,
+        name="profile_stacks"
+    ),
+    path(
+        "img/<str:token>/<int:width>x<int:height>/<str:fmt>",
+        views.image,
+        name="image"
+    ),
+]
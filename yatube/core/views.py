@@ -1,4 +1,21 @@
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .images import FORMATS, ImageBusy, ImageError, get_image, read_token
+from .media import (PartialFile, accel_headers, cache_control,
+                    content_type, etag_matches, file_etag, has_access,
+                    parse_range)
+from .metrics import collect, render_prometheus
+from .profiler import list_profiles, load_profile, stacks_path
 
 
 def page_not_found(request, exception):
@@ -11,3 +28,137 @@ def server_error(request):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    allowed = request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+    if not (allowed or request.user.is_staff):
+        raise Http404
+    return HttpResponse(
+        render_prometheus(collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@staff_member_required
+def profiles(request):
+    return render(request, "core/profiles.html", {
+        "profiles": list_profiles(),
+    })
+
+
+@staff_member_required
+def profile_detail(request, name):
+    try:
+        profile = load_profile(name)
+    except (OSError, ValueError):
+        raise Http404
+    return render(request, "core/profile_detail.html", {"profile": profile})
+
+
+@staff_member_required
+def profile_stacks(request, name):
+    try:
+        stacks = open(stacks_path(name), "rb")
+    except (OSError, ValueError):
+        raise Http404
+    return FileResponse(
+        stacks,
+        as_attachment=True,
+        filename=f"{name}.folded",
+        content_type="text/plain; charset=utf-8",
+    )
+
+
+def image(request, token, width, height, fmt):
+    name = read_token(token, width, height, fmt)
+    limit = settings.IMAGE_MAX_DIMENSION
+    if (
+        name is None or fmt not in FORMATS
+        or not (0 < width <= limit and 0 < height <= limit)
+    ):
+        raise Http404
+    try:
+        path = get_image(name, width, height, fmt)
+    except ImageError:
+        raise Http404
+    except ImageBusy:
+        response = HttpResponse("Картинка готовится, повторите позже.",
+                                status=503,
+                                content_type="text/plain; charset=utf-8")
+        response["Retry-After"] = 5
+        return response
+    # Файл отдаёт сервер через wsgi.file_wrapper (sendfile у gunicorn).
+    response = FileResponse(open(path, "rb"), content_type=FORMATS[fmt])
+    # Адрес меняется вместе с исходником и размером: копия неизменна.
+    response["Cache-Control"] = (
+        f"public, max-age={settings.IMAGE_MAX_AGE}, immutable"
+    )
+    return response
+
+
+def media(request, path):
+    """Отдача MEDIA_ROOT в production: ETag и If-None-Match, Range, проверки
+    доступа MEDIA_ACCESS_CHECKS и передача файла фронтенд-серверу
+    (MEDIA_ACCEL)."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404
+    if not os.path.isfile(full_path) or not has_access(request, path):
+        raise Http404
+    etag = file_etag(stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": cache_control(),
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if etag_matches(if_none_match, etag) or (
+        if_none_match is None and not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"),
+            stat.st_mtime, stat.st_size,
+        )
+    ):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+    accel = accel_headers(path, full_path)
+    if accel is not None:
+        # Range и отдачу файла обрабатывает сервер.
+        response = HttpResponse(content_type=content_type(full_path))
+        headers.update(accel)
+    else:
+        response = file_response(request, full_path, stat.st_size, etag)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def file_response(request, full_path, size, etag):
+    if_range = request.META.get("HTTP_IF_RANGE")
+    try:
+        byte_range = (
+            parse_range(request.META.get("HTTP_RANGE"), size)
+            if if_range is None or etag_matches(if_range, etag) else None
+        )
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    file = open(full_path, "rb")
+    if byte_range is None:
+        # Весь файл: сервер отдаст его через wsgi.file_wrapper (sendfile).
+        return FileResponse(file, content_type=content_type(full_path))
+    start, end = byte_range
+    response = FileResponse(
+        PartialFile(file, start, end - start + 1),
+        status=206,
+        content_type=content_type(full_path),
+    )
+    response["Content-Length"] = end - start + 1
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
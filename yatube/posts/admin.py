@@ -1,9 +1,18 @@
+from core.paginator import ApproximateCountPaginator
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .revisions import save_edit
 
 
-class PostAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    # Без COUNT(*) по всей таблице: приближённый счёт для пагинатора и
+    # без подсчёта "всего N" рядом с результатами поиска.
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = (
         "pk",
         "text",
@@ -12,10 +21,35 @@ class PostAdmin(admin.ModelAdmin):
         "group",
     )
     list_editable = ("group",)
+    # Номер версии ведёт save_edit.
+    readonly_fields = ("version",)
+    list_select_related = ("author", "group")
+    raw_id_fields = ("author",)
     search_fields = ("text",)
-    list_filter = ("pub_date",)
+    list_filter = ("pub_date", "group")
+    date_hierarchy = "pub_date"
     empty_value_display = "-пусто-"
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == "group" and request is not None:
+            # list_editable строит <select> групп в каждой строке: список
+            # вариантов читается один раз на запрос.
+            if not hasattr(request, "_group_choices"):
+                request._group_choices = [
+                    choice for choice in field.choices
+                ]
+            field.choices = request._group_choices
+        return field
+
+    def save_model(self, request, obj, form, change):
+        # Правки текста из админки тоже попадают в историю версий. Форма
+        # list_editable в списке постов содержит только группу.
+        if change and "text" in form.changed_data:
+            save_edit(obj)
+        else:
+            super().save_model(request, obj, form, change)
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
@@ -28,26 +62,33 @@ class GroupAdmin(admin.ModelAdmin):
     list_filter = ("title",)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = (
         "author",
+        "post",
         "text",
         "pub_date",
     )
+    list_select_related = ("author", "post")
+    raw_id_fields = ("post", "author")
     search_fields = (
-        'author',
+        'author__username',
         'text',
     )
+    list_filter = ("pub_date",)
+    date_hierarchy = "pub_date"
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = (
         "user",
         "author",
     )
+    list_select_related = ("user", "author")
+    raw_id_fields = ("user", "author")
     search_fields = (
-        "user",
-        "author",
+        "user__username",
+        "author__username",
     )
 
 
@@ -0,0 +1,95 @@
+from core.paginator import approximate_count
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.http import Http404
+
+from .models import ArchivedComment, ArchivedPost, Post
+
+User = get_user_model()
+
+
+class ChainedPosts:
+    """Горячие посты, а за ними архивные - одной последовательностью
+    для Paginator. Архив старше любого горячего поста, поэтому порядок
+    "-pub_date" сохраняется, а архив читается, только когда страница
+    до него доходит."""
+
+    def __init__(self, posts, archived):
+        self.posts = posts
+        self.archived = archived
+
+    def count(self):
+        return self.hot_count + self.archived.count()
+
+    def approximate_count(self):
+        """Для ApproximateCountPaginator: горячие посты считаются точно
+        (по ним делится последовательность, и их немного - не старше
+        ARCHIVE_AFTER_DAYS), растущий архив - приблизительно."""
+        archived, is_exact = approximate_count(self.archived)
+        return self.hot_count + archived, is_exact
+
+    @property
+    def hot_count(self):
+        if not hasattr(self, "_hot_count"):
+            self._hot_count = self.posts.count()
+        return self._hot_count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        items = []
+        if start < self.hot_count:
+            items += self.posts[start:min(stop, self.hot_count)]
+        if stop > self.hot_count:
+            items += self.archived[
+                max(start - self.hot_count, 0):stop - self.hot_count
+            ]
+        return items
+
+
+def archived_posts(author):
+    # prefetch, а не select_related: архив может лежать в другой базе.
+    return ArchivedPost.objects.filter(author_id=author.pk).prefetch_related(
+        "author", "group"
+    )
+
+
+def author_posts(author):
+    return ChainedPosts(
+        author.post_set.select_related("group").all(), archived_posts(author)
+    )
+
+
+def count_author_posts(author):
+    return author.post_set.count() + archived_posts(author).count()
+
+
+def get_post_or_archived(post_id):
+    """Пост из горячей таблицы, а если его там нет - из архива."""
+    try:
+        return Post.objects.select_related("author", "group").get(pk=post_id)
+    except Post.DoesNotExist:
+        pass
+    try:
+        return ArchivedPost.objects.get(pk=post_id)
+    except ArchivedPost.DoesNotExist:
+        raise Http404("No Post matches the given query.")
+
+
+def get_comments(post):
+    if post.is_archived:
+        return post.comments.prefetch_related("author")
+    return post.comments.select_related("author")
+
+
+@receiver(post_delete, sender=User)
+def delete_archived(sender, instance, **kwargs):
+    # У архивных таблиц нет внешних ключей на пользователей, каскад
+    # удаления делается вручную.
+    ArchivedComment.objects.filter(author_id=instance.pk).delete()
+    ArchivedPost.objects.filter(author_id=instance.pk).delete()
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from posts.models import (ArchivedComment, ArchivedPost,
+                          ArchivedPostRevision, Comment, Post, PostRevision)
+
+POST_FIELDS = (
+    "id", "text", "text_html", "author_id", "group_id", "image", "thumbnail",
+    "thumbnail_width", "thumbnail_height", "pub_date", "version",
+)
+REVISION_FIELDS = (
+    "id", "post_id", "number", "is_snapshot", "data", "group_id", "image",
+    "created",
+)
+COMMENT_FIELDS = (
+    "id", "post_id", "author_id", "text", "text_html", "pub_date",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит посты старше --older-than дней вместе с комментариями "
+        "и историей правок в архивные таблицы базы "
+        "settings.ARCHIVE_DATABASE. Пачка сначала записывается в архив и "
+        "только потом удаляется из горячих таблиц, поэтому прерванный "
+        "запуск достаточно повторить."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help="Возраст поста в днях.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        old_posts = Post.objects.filter(pub_date__lt=cutoff).order_by("pk")
+        if options["dry_run"]:
+            self.stdout.write(f"К архивации: {old_posts.count()} постов")
+            return
+        posts = comments = conflicts = 0
+        last_pk = 0
+        while True:
+            rows = list(old_posts.filter(pk__gt=last_pk).values_list(
+                *POST_FIELDS
+            )[:options["batch_size"]])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            ids = [row[0] for row in rows]
+            comment_rows = list(Comment.objects.filter(
+                post_id__in=ids
+            ).values_list(*COMMENT_FIELDS))
+            revision_rows = list(PostRevision.objects.filter(
+                post_id__in=ids
+            ).values_list(*REVISION_FIELDS))
+            with transaction.atomic(using=settings.ARCHIVE_DATABASE):
+                # ignore_conflicts нужен для повтора прерванного запуска:
+                # строки, уже перенесённые прошлым запуском, пропускаются.
+                ArchivedPost.objects.bulk_create(
+                    [ArchivedPost(**dict(zip(POST_FIELDS, row)))
+                     for row in rows],
+                    ignore_conflicts=True,
+                )
+                ArchivedPostRevision.objects.bulk_create(
+                    [ArchivedPostRevision(**dict(zip(REVISION_FIELDS, row)))
+                     for row in revision_rows],
+                    ignore_conflicts=True,
+                )
+                ArchivedComment.objects.bulk_create(
+                    [ArchivedComment(**dict(zip(COMMENT_FIELDS, row)))
+                     for row in comment_rows],
+                    ignore_conflicts=True,
+                )
+            archived = self.archived_ids(rows, comment_rows, revision_rows)
+            conflicts += len(ids) - len(archived)
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                Post.objects.filter(pk__in=archived).delete()
+            posts += len(archived)
+            comments += sum(row[1] in archived for row in comment_rows)
+        self.stdout.write(
+            f"В архив перенесено постов: {posts}, комментариев: {comments}"
+        )
+        if conflicts:
+            self.stderr.write(
+                f"Не перенесено постов: {conflicts} - их id или id их "
+                "комментариев и версий уже заняты в архиве другими строками"
+            )
+
+    def archived_ids(self, rows, comment_rows, revision_rows):
+        """id постов, которые вместе с комментариями и версиями лежат
+        в архиве. Строка архива с тем же id, но от другого поста (id
+        переиспользован после прошлой архивации), - не копия: такой пост
+        остаётся в горячей таблице."""
+        posts = {
+            pk: (author_id, pub_date)
+            for pk, author_id, pub_date in ArchivedPost.objects.filter(
+                pk__in=[row[0] for row in rows]
+            ).values_list("pk", "author_id", "pub_date")
+        }
+        author = POST_FIELDS.index("author_id")
+        pub_date = POST_FIELDS.index("pub_date")
+        ids = {
+            row[0] for row in rows
+            if posts.get(row[0]) == (row[author], row[pub_date])
+        }
+        for model, children in (
+            (ArchivedComment, comment_rows),
+            (ArchivedPostRevision, revision_rows),
+        ):
+            owners = dict(model.objects.filter(
+                pk__in=[row[0] for row in children]
+            ).values_list("pk", "post_id"))
+            ids -= {
+                row[1] for row in children if owners.get(row[0]) != row[1]
+            }
+        return ids
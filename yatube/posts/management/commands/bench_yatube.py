@@ -0,0 +1,151 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержку и число SQL-запросов index, group_posts, "
+        "profile, post_detail и follow_index на текущих данных "
+        "(наполнить их можно командой seed_yatube)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument(
+            "--warm-cache", action="store_true",
+            help="Не очищать кэш между запросами.",
+        )
+        parser.add_argument(
+            "--page", type=int, default=1,
+            help="Номер страницы для лент с пагинацией.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=1,
+            help="Число одновременных клиентов (потоков WSGI-обработчика).",
+        )
+
+    def handle(self, *args, **options):
+        cases = self.cases(options["page"])
+        self.stdout.write(
+            f"Постов: {Post.objects.count()}, "
+            f"итераций: {options['iterations']}, "
+            f"клиентов: {options['concurrency']}"
+        )
+        self.stdout.write(
+            f"{'view':<14}{'запросов':>10}{'p50, мс':>10}"
+            f"{'p99, мс':>10}{'среднее':>10}{'запр./с':>10}"
+        )
+        for name, user, url in cases:
+            queries = self.count_queries(user, url)
+            started = time.perf_counter()
+            timings = self.measure(
+                user, url, options["iterations"], options["warm_cache"],
+                options["concurrency"],
+            )
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name:<14}{queries:>10}"
+                f"{percentile(timings, 0.5):>10.2f}"
+                f"{percentile(timings, 0.99):>10.2f}"
+                f"{sum(timings) / len(timings):>10.2f}"
+                f"{len(timings) / elapsed:>10.1f}"
+            )
+
+    def cases(self, page):
+        post = Post.objects.annotate(
+            comment_count=Count("comments")
+        ).order_by("-comment_count").first()
+        if post is None:
+            raise CommandError("Нет постов: сначала запустите seed_yatube.")
+        group = Group.objects.annotate(
+            post_count=Count("posts")
+        ).order_by("-post_count").first()
+        author = User.objects.annotate(
+            post_count=Count("post")
+        ).order_by("-post_count").first()
+        follower = User.objects.filter(
+            pk=Follow.objects.values("user").annotate(
+                follow_count=Count("author")
+            ).order_by("-follow_count").values("user")[:1]
+        ).first() or author
+        query = f"?page={page}"
+        cases = [
+            ("index", None, reverse("posts:index") + query),
+            ("profile", None,
+             reverse("posts:profile", args=[author.username]) + query),
+            ("post_detail", None,
+             reverse("posts:post_detail", args=[post.pk])),
+            ("follow_index", follower,
+             reverse("posts:follow_index") + query),
+        ]
+        if group is not None:
+            cases.insert(1, ("group_posts", None, reverse(
+                "posts:group_list", args=[group.slug]
+            ) + query))
+        return cases
+
+    def count_queries(self, user, url):
+        client = make_client(user)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.get(client, url)
+        return len(queries)
+
+    def measure(self, user, url, iterations, warm_cache, concurrency):
+        def worker(count):
+            client = make_client(user)
+            timings = []
+            try:
+                for _ in range(count):
+                    if not warm_cache:
+                        cache.clear()
+                    started = time.perf_counter()
+                    self.get(client, url)
+                    timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                if concurrency > 1:
+                    connections.close_all()
+            return timings
+
+        if concurrency <= 1:
+            return worker(iterations)
+        shares = [
+            iterations // concurrency + (number < iterations % concurrency)
+            for number in range(concurrency)
+        ]
+        with ThreadPoolExecutor(concurrency) as pool:
+            return [
+                timing for timings in pool.map(worker, shares)
+                for timing in timings
+            ]
+
+    def get(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"{url} вернул {response.status_code}")
+
+
+def make_client(user):
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    return client
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedPost, Post
+from posts.thumbnails import FIELDS, make_thumbnail
+
+MODELS = (Post, ArchivedPost)
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит миниатюры картинок постов (в том числе архивных) и "
+        "записывает их путь и размеры в строки постов. По умолчанию - "
+        "только для постов без миниатюры, например после import_yatube."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Перестроить и уже готовые миниатюры (после смены размера).",
+        )
+
+    def handle(self, *args, **options):
+        for model in MODELS:
+            checked, updated = self.build(
+                model, options["batch_size"], options["all"]
+            )
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: "
+                f"проверено {checked}, обновлено {updated}"
+            )
+
+    def build(self, model, batch_size, rebuild):
+        posts = model.objects.exclude(image="")
+        if not rebuild:
+            posts = posts.filter(thumbnail="")
+        checked = updated = 0
+        last_pk = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk).order_by(
+                "pk"
+            ).only("pk", "image", *FIELDS)[:batch_size])
+            if not batch:
+                return checked, updated
+            changed = []
+            for post in batch:
+                values = make_thumbnail(post.image)
+                if values != tuple(getattr(post, field) for field in FIELDS):
+                    for field, value in zip(FIELDS, values):
+                        setattr(post, field, value)
+                    changed.append(post)
+            model.objects.bulk_update(changed, FIELDS)
+            checked += len(batch)
+            updated += len(changed)
+            last_pk = batch[-1].pk
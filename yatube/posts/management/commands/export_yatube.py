@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.models import (ArchivedComment, ArchivedPost,
+                          ArchivedPostRevision, Comment, Follow, Group, Post,
+                          PostRevision)
+
+from ..jsonl import JSONLEncoder, open_jsonl
+
+User = get_user_model()
+
+REVISION_FIELDS = (
+    "id", "post_id", "number", "is_snapshot", "data", "group_id", "image",
+    "created",
+)
+# Порядок важен: при импорте каждая модель ссылается только на уже
+# загруженные выше.
+EXPORTED = (
+    ("user", User, (
+        "id", "username", "password", "first_name", "last_name", "email",
+        "is_staff", "is_active", "date_joined",
+    )),
+    ("group", Group, ("id", "title", "slug", "description")),
+    ("post", Post, (
+        "id", "text", "author_id", "group_id", "image", "pub_date",
+        "version",
+    )),
+    ("comment", Comment, (
+        "id", "post_id", "author_id", "text", "pub_date",
+    )),
+    ("revision", PostRevision, REVISION_FIELDS),
+    ("archived_post", ArchivedPost, (
+        "id", "text", "author_id", "group_id", "image", "pub_date",
+        "version",
+    )),
+    ("archived_comment", ArchivedComment, (
+        "id", "post_id", "author_id", "text", "pub_date",
+    )),
+    ("archived_revision", ArchivedPostRevision, REVISION_FIELDS),
+    ("follow", Follow, ("user_id", "author_id")),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает пользователей, группы, посты, комментарии, историю "
+        "правок, архив и подписки в JSONL (.gz/.zst - со сжатием) "
+        "построчно, без загрузки в память."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--compression", choices=("gzip", "zstd"))
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        encoder = JSONLEncoder(ensure_ascii=False)
+        with open_jsonl(options["path"], "w", options["compression"]) as out:
+            for name, model, fields in EXPORTED:
+                rows = model.objects.order_by(*fields[:1]).values_list(
+                    *fields
+                ).iterator(chunk_size=options["chunk_size"])
+                count = 0
+                for row in rows:
+                    record = dict(zip(fields, row))
+                    record["model"] = name
+                    out.write(encoder.encode(record))
+                    out.write("\n")
+                    count += 1
+                self.stdout.write(f"{name}: {count}")
@@ -0,0 +1,224 @@
+import base64
+import json
+import sqlite3
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from posts.models import (ArchivedComment, ArchivedPost,
+                          ArchivedPostRevision, Comment, Follow, Group, Post,
+                          PostRevision)
+
+from ..jsonl import open_jsonl
+from ..utils import keep_pub_date, max_pk, rendered, reset_sequences
+
+User = get_user_model()
+
+
+class ImportState:
+    """Файл состояния импорта (SQLite рядом с выгрузкой).
+
+    Хранит таблицы соответствия id пользователей и групп (их сопоставляют
+    по username и slug с уже существующими записями), сдвиги id постов и
+    комментариев и номер последней загруженной строки. Память процесса
+    от размера выгрузки не зависит, а прерванный импорт продолжается
+    с места остановки.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS idmap ("
+            " model TEXT, old INTEGER, new INTEGER,"
+            " PRIMARY KEY (model, old));"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);"
+        )
+
+    def get(self, key, default=None):
+        row = self.db.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return default if row is None else row[0]
+
+    def set(self, key, value):
+        self.db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    def map_ids(self, model, pairs):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO idmap (model, old, new) VALUES (?, ?, ?)",
+            ((model, old, new) for old, new in pairs),
+        )
+
+    def lookup(self, model, old_ids):
+        old_ids = list({old for old in old_ids if old is not None})
+        mapping = {}
+        for start in range(0, len(old_ids), 500):
+            chunk = old_ids[start:start + 500]
+            mapping.update(self.db.execute(
+                "SELECT old, new FROM idmap WHERE model = ? AND old IN (%s)"
+                % ", ".join("?" * len(chunk)),
+                [model, *chunk],
+            ))
+        return mapping
+
+    def commit(self):
+        self.db.commit()
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает выгрузку export_yatube пачками через bulk_create. "
+        "Повторный запуск с тем же --state продолжает прерванный импорт."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--compression", choices=("gzip", "zstd"))
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--state",
+            help="Файл состояния, по умолчанию <path>.state.sqlite3",
+        )
+
+    def handle(self, *args, **options):
+        state = ImportState(
+            options["state"] or options["path"] + ".state.sqlite3"
+        )
+        self.state = state
+        # Сдвиги считаются по горячим и архивным таблицам вместе: посты
+        # и комментарии выгрузки попадают в обе.
+        for key, model in (
+            ("post_offset", Post), ("comment_offset", Comment),
+            ("revision_offset", PostRevision),
+        ):
+            if state.get(key) is None:
+                state.set(key, max_pk(model))
+        state.commit()
+        self.post_offset = state.get("post_offset")
+        self.comment_offset = state.get("comment_offset")
+        self.revision_offset = state.get("revision_offset")
+        done = state.get("line", 0)
+        if done:
+            self.stdout.write(f"Продолжение импорта со строки {done + 1}")
+
+        batch, batch_model, line_number = [], None, 0
+        with open_jsonl(options["path"], "r", options["compression"]) as src:
+            with keep_pub_date():
+                for line_number, line in enumerate(src, 1):
+                    if line_number <= done:
+                        continue
+                    record = json.loads(line)
+                    model = record.pop("model")
+                    if batch and (
+                        model != batch_model
+                        or len(batch) >= options["batch_size"]
+                    ):
+                        self.flush(batch_model, batch, line_number - 1)
+                        batch = []
+                    batch_model = model
+                    batch.append(record)
+                if batch:
+                    self.flush(batch_model, batch, line_number)
+        reset_sequences(Post, Comment, PostRevision)
+        self.stdout.write(
+            self.style.SUCCESS(f"Загружено строк: {line_number}")
+        )
+
+    def flush(self, model, records, line_number):
+        loader = getattr(self, f"load_{model}", None)
+        if loader is None:
+            raise CommandError(f"Неизвестная модель в выгрузке: {model}")
+        with transaction.atomic():
+            loader(records)
+        self.state.set("line", line_number)
+        self.state.commit()
+
+    def load_user(self, records):
+        users = [User(
+            **{key: value for key, value in record.items() if key != "id"},
+        ) for record in records]
+        for user in users:
+            user.date_joined = parse_datetime(user.date_joined)
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        new_ids = dict(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).values_list("username", "id"))
+        self.state.map_ids("user", (
+            (record["id"], new_ids[record["username"]])
+            for record in records
+        ))
+
+    def load_group(self, records):
+        Group.objects.bulk_create([Group(
+            **{key: value for key, value in record.items() if key != "id"},
+        ) for record in records], ignore_conflicts=True)
+        new_ids = dict(Group.objects.filter(
+            slug__in=[record["slug"] for record in records]
+        ).values_list("slug", "id"))
+        self.state.map_ids("group", (
+            (record["id"], new_ids[record["slug"]]) for record in records
+        ))
+
+    def load_post(self, records, model=Post):
+        users = self.state.lookup("user", (r["author_id"] for r in records))
+        groups = self.state.lookup("group", (r["group_id"] for r in records))
+        model.objects.bulk_create(rendered([model(
+            id=record["id"] + self.post_offset,
+            text=record["text"],
+            author_id=users[record["author_id"]],
+            group_id=groups.get(record["group_id"]),
+            image=record["image"],
+            pub_date=parse_datetime(record["pub_date"]),
+            # В выгрузках старых версий номера правки нет.
+            version=record.get("version", 1),
+        ) for record in records]), ignore_conflicts=True)
+
+    def load_comment(self, records, model=Comment):
+        users = self.state.lookup("user", (r["author_id"] for r in records))
+        model.objects.bulk_create(rendered([model(
+            id=record["id"] + self.comment_offset,
+            post_id=(
+                record["post_id"] + self.post_offset
+                if record["post_id"] is not None else None
+            ),
+            author_id=users[record["author_id"]],
+            text=record["text"],
+            pub_date=parse_datetime(record["pub_date"]),
+        ) for record in records]), ignore_conflicts=True)
+
+    def load_revision(self, records, model=PostRevision):
+        groups = self.state.lookup("group", (r["group_id"] for r in records))
+        model.objects.bulk_create([model(
+            id=record["id"] + self.revision_offset,
+            post_id=record["post_id"] + self.post_offset,
+            number=record["number"],
+            is_snapshot=record["is_snapshot"],
+            data=base64.b64decode(record["data"]),
+            group_id=groups.get(record["group_id"]),
+            image=record["image"],
+            created=parse_datetime(record["created"]),
+        ) for record in records], ignore_conflicts=True)
+
+    def load_archived_post(self, records):
+        self.load_post(records, ArchivedPost)
+
+    def load_archived_comment(self, records):
+        self.load_comment(records, ArchivedComment)
+
+    def load_archived_revision(self, records):
+        self.load_revision(records, ArchivedPostRevision)
+
+    def load_follow(self, records):
+        users = self.state.lookup("user", (
+            user_id for record in records
+            for user_id in (record["user_id"], record["author_id"])
+        ))
+        Follow.objects.bulk_create([Follow(
+            user_id=users[record["user_id"]],
+            author_id=users[record["author_id"]],
+        ) for record in records], ignore_conflicts=True)
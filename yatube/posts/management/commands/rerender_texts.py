@@ -0,0 +1,45 @@
+from core.text import render_text
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+MODELS = (Post, Comment, ArchivedPost, ArchivedComment)
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает сохранённый HTML текстов постов и комментариев "
+        "(в том числе архивных) после смены правил отрисовки. Записываются "
+        "только изменившиеся строки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model in MODELS:
+            checked, updated = self.rerender(model, options["batch_size"])
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: "
+                f"проверено {checked}, обновлено {updated}"
+            )
+
+    def rerender(self, model, batch_size):
+        checked = updated = 0
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_pk).order_by(
+                "pk"
+            ).only("pk", "text", "text_html")[:batch_size])
+            if not batch:
+                return checked, updated
+            changed = []
+            for obj in batch:
+                html = render_text(obj.text)
+                if html != obj.text_html:
+                    obj.text_html = html
+                    changed.append(obj)
+            model.objects.bulk_update(changed, ["text_html"])
+            checked += len(batch)
+            updated += len(changed)
+            last_pk = batch[-1].pk
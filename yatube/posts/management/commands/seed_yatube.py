@@ -0,0 +1,163 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts.models import Comment, Follow, Group, Post
+
+from ..utils import keep_pub_date, max_pk, rendered, reset_sequences
+
+User = get_user_model()
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса закона Ципфа: немногие авторы пишут большую
+    часть постов, немногие посты собирают большую часть комментариев."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def next_pk(model):
+    return max_pk(model) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует синтетический набор данных: пользователей, группы, "
+        "посты со степенным распределением по авторам, комментарии и "
+        "граф подписок."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=10000)
+        parser.add_argument("--comments", type=int, default=20000)
+        parser.add_argument("--follows-per-user", type=int, default=20)
+        parser.add_argument("--exponent", type=float, default=1.1)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        fake = Faker("ru_RU")
+        fake.seed_instance(options["seed"])
+        self.words = fake.words(2000)
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.span = timedelta(days=options["days"]).total_seconds()
+
+        users = self.seed_users(options["users"])
+        groups = self.seed_groups(options["groups"], fake)
+        # Популярность авторов перемешана, чтобы не совпадала с порядком id.
+        authors = users[:]
+        self.random.shuffle(authors)
+        author_weights = zipf_weights(len(authors), options["exponent"])
+        with keep_pub_date():
+            posts = self.seed_posts(
+                options["posts"], authors, author_weights, groups
+            )
+            self.seed_comments(
+                options["comments"], posts, users, options["exponent"]
+            )
+        self.seed_follows(
+            options["follows_per_user"], users, authors, author_weights
+        )
+        reset_sequences(User, Group, Post, Comment)
+        self.stdout.write(self.style.SUCCESS(
+            f"Пользователей: {len(users)}, групп: {len(groups)}, "
+            f"постов: {options['posts']}, "
+            f"комментариев: {options['comments']}"
+        ))
+
+    def text(self, low, high):
+        return " ".join(self.random.choices(
+            self.words, k=self.random.randint(low, high)
+        )).capitalize()
+
+    def pub_date(self):
+        return self.now - timedelta(seconds=self.random.random() * self.span)
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def seed_users(self, count):
+        password = make_password("password")
+        first = next_pk(User)
+        for start, size in self.batches(count):
+            User.objects.bulk_create([User(
+                pk=first + number,
+                username=f"seed_user_{first + number}",
+                password=password,
+            ) for number in range(start, start + size)])
+        return list(range(first, first + count))
+
+    def seed_groups(self, count, fake):
+        first = next_pk(Group)
+        Group.objects.bulk_create([Group(
+            pk=first + number,
+            title=fake.catch_phrase(),
+            slug=f"seed-group-{first + number}",
+            description=self.text(10, 30),
+        ) for number in range(count)])
+        return list(range(first, first + count))
+
+    def seed_posts(self, count, authors, author_weights, groups):
+        first = next_pk(Post)
+        for start, size in self.batches(count):
+            with transaction.atomic():
+                Post.objects.bulk_create(rendered([Post(
+                    pk=first + number,
+                    text=self.text(5, 80),
+                    author_id=author,
+                    group_id=(
+                        self.random.choice(groups)
+                        if groups and self.random.random() < 0.7 else None
+                    ),
+                    pub_date=self.pub_date(),
+                ) for number, author in zip(
+                    range(start, start + size),
+                    self.random.choices(
+                        authors, cum_weights=author_weights, k=size
+                    ),
+                )]))
+        return list(range(first, first + count))
+
+    def seed_comments(self, count, posts, users, exponent):
+        if not posts:
+            return
+        popular = posts[:]
+        self.random.shuffle(popular)
+        weights = zipf_weights(len(popular), exponent)
+        for start, size in self.batches(count):
+            with transaction.atomic():
+                Comment.objects.bulk_create(rendered([Comment(
+                    post_id=post,
+                    author_id=self.random.choice(users),
+                    text=self.text(3, 30),
+                    pub_date=self.pub_date(),
+                ) for post in self.random.choices(
+                    popular, cum_weights=weights, k=size
+                )]))
+
+    def seed_follows(self, per_user, users, authors, author_weights):
+        follows = []
+        for user in users:
+            for author in set(self.random.choices(
+                authors, cum_weights=author_weights, k=per_user
+            )):
+                if author != user:
+                    follows.append(Follow(user_id=user, author_id=author))
+            if len(follows) >= self.batch_size:
+                Follow.objects.bulk_create(follows, ignore_conflicts=True)
+                follows = []
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
@@ -0,0 +1,199 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from core.cache import is_shared
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.thumbnails import FIELDS, make_thumbnail
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогревает кэши после выкладки: открывает первые страницы главной, "
+        "самые большие группы и профили с наибольшим числом подписчиков и "
+        "заранее создаёт миниатюры свежих постов. Запросы идут параллельно."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages", type=int, default=3,
+            help="Сколько первых страниц главной открыть.",
+        )
+        parser.add_argument(
+            "--groups", type=int, default=5,
+            help="Сколько групп с наибольшим числом постов открыть.",
+        )
+        parser.add_argument(
+            "--profiles", type=int, default=10,
+            help="Сколько профилей с наибольшим числом подписчиков открыть.",
+        )
+        parser.add_argument(
+            "--thumbnails", type=int, default=None,
+            help="Для скольких свежих постов с картинками создать миниатюры "
+                 "(по умолчанию - для постов первых страниц главной, "
+                 "0 - не создавать).",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=4,
+            help="Число одновременных запросов.",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Адрес запущенного сайта, например http://127.0.0.1:8000: "
+                 "страницы запрашиваются у его воркеров.",
+        )
+        parser.add_argument(
+            "--host",
+            help="Без --base-url страницы рендерятся в этом процессе: "
+                 "имя сайта, под которым их запрашивают посетители "
+                 "(от него зависят ключи кэша). Нужен общий STAMPEDE_CACHE.",
+        )
+        parser.add_argument(
+            "--scheme", choices=("http", "https"),
+            help="Схема, которую видит приложение, для --host. По "
+                 "умолчанию https только с SECURE_PROXY_SSL_HEADER: без "
+                 "него запросы из-за прокси приходят как http.",
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def check_target(self, base_url, host):
+        if base_url:
+            return
+        # Ключи кэша страниц строятся по build_absolute_uri(), а
+        # LocMemCache исчезнет вместе с этим процессом.
+        if not host:
+            raise CommandError("Укажите --base-url или --host.")
+        if not is_shared(settings.STAMPEDE_CACHE):
+            raise CommandError(
+                f"Кэш {settings.STAMPEDE_CACHE!r} живёт только в этом "
+                "процессе: прогрейте сайт через --base-url."
+            )
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"]
+        host = options["host"]
+        self.check_target(base_url, host)
+        urls = self.urls(
+            options["pages"], options["groups"], options["profiles"]
+        )
+        thumbnails = options["thumbnails"]
+        if thumbnails is None:
+            thumbnails = options["pages"] * settings.POSTS_PER_PAGE
+        posts = list(
+            Post.objects.exclude(image="").order_by("-pub_date").only(
+                "pk", "image", *FIELDS
+            )[:thumbnails]
+        ) if thumbnails > 0 else []
+        concurrency = max(1, options["concurrency"])
+        # Ключ кэша страницы строится по build_absolute_uri(), поэтому
+        # схема должна совпасть с той, что получают запросы посетителей.
+        scheme = options["scheme"] or (
+            "https" if settings.SECURE_PROXY_SSL_HEADER else "http"
+        )
+        timeout = options["timeout"]
+
+        def fetch(url):
+            try:
+                if base_url:
+                    return self.fetch_http(base_url + url, timeout)
+                return self.fetch_local(url, host, scheme)
+            finally:
+                if concurrency > 1:
+                    connections.close_all()
+
+        def thumbnail(post):
+            try:
+                return self.make_thumbnail(post)
+            finally:
+                if concurrency > 1:
+                    connections.close_all()
+
+        started = time.perf_counter()
+        failed = 0
+        with ThreadPoolExecutor(concurrency) as pool:
+            # С одним потоком всё выполняется здесь же, в соединении
+            # с БД команды (так же, как в bench_yatube).
+            run = pool.map if concurrency > 1 else map
+            # Сначала миниатюры: страницы затем возьмут их из строк постов.
+            for post, (error, elapsed) in zip(posts, run(thumbnail, posts)):
+                failed += error is not None
+                self.stdout.write(
+                    f"{'ok' if error is None else 'ошибка':>5}"
+                    f"{elapsed:>10.1f} мс  {post.image.name}"
+                    + (f": {error}" if error is not None else "")
+                )
+            for url, (status, elapsed) in zip(urls, run(fetch, urls)):
+                failed += status != 200
+                self.stdout.write(f"{status:>5}{elapsed:>10.1f} мс  {url}")
+        self.stdout.write(
+            f"Страниц: {len(urls)}, миниатюр: {len(posts)}, "
+            f"за {time.perf_counter() - started:.1f} с"
+        )
+        if failed:
+            raise CommandError(f"Не удалось прогреть: {failed}")
+
+    def urls(self, pages, groups, profiles):
+        index = reverse("posts:index")
+        urls = [index] if pages > 0 else []
+        urls += [f"{index}?page={page}" for page in range(2, pages + 1)]
+        urls += [
+            reverse("posts:group_list", args=[slug])
+            for slug in Group.objects.annotate(
+                post_count=Count("posts")
+            ).order_by("-post_count", "pk").values_list("slug", flat=True)[
+                :groups
+            ]
+        ]
+        urls += [
+            reverse("posts:profile", args=[username])
+            for username in User.objects.annotate(
+                follower_count=Count("following")
+            ).order_by("-follower_count", "pk").values_list(
+                "username", flat=True
+            )[:profiles]
+        ]
+        return urls
+
+    def fetch_local(self, url, host, scheme):
+        started = time.perf_counter()
+        response = Client(
+            HTTP_ACCEPT_ENCODING="br, gzip", HTTP_HOST=host
+        ).get(url, secure=scheme == "https")
+        # Тело потоковых ответов формируется при чтении.
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response.status_code, (time.perf_counter() - started) * 1000
+
+    def fetch_http(self, url, timeout):
+        request = Request(url, headers={"Accept-Encoding": "br, gzip"})
+        started = time.perf_counter()
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except URLError as error:
+            raise CommandError(f"{url}: {error.reason}")
+        return status, (time.perf_counter() - started) * 1000
+
+    def make_thumbnail(self, post):
+        started = time.perf_counter()
+        values = make_thumbnail(post.image)
+        if values[0] and values != tuple(
+            getattr(post, field) for field in FIELDS
+        ):
+            Post.objects.filter(pk=post.pk).update(**dict(zip(FIELDS, values)))
+        error = None if values[0] else "миниатюра не построена"
+        return error, (time.perf_counter() - started) * 1000
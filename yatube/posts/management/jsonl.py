@@ -0,0 +1,52 @@
+import base64
+import datetime
+import gzip
+import io
+
+from django.core.management.base import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class JSONLEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder обрезает время до миллисекунд.
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        # BinaryField (данные версий постов) - строкой base64.
+        if isinstance(o, (bytes, memoryview)):
+            return base64.b64encode(o).decode()
+        return super().default(o)
+
+
+def compression_for(path, compression=None):
+    if compression:
+        return compression
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def open_jsonl(path, mode, compression=None):
+    """Открывает JSONL-файл на чтение ("r") или запись ("w") как текст,
+    прозрачно сжимая его gzip или zstd по расширению либо явному выбору."""
+    compression = compression_for(path, compression)
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise CommandError(
+                "Для zstd установите пакет zstandard: pip install zstandard"
+            )
+        raw = open(path, mode + "b")
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    if compression is not None:
+        raise CommandError(f"Неизвестное сжатие: {compression}")
+    return open(path, mode, encoding="utf-8")
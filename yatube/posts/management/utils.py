@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+
+from core.text import render_text
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+
+from posts.models import (ArchivedComment, ArchivedPost,
+                          ArchivedPostRevision, Comment, Post, PostRevision)
+
+# Архив хранит исходные id: новым строкам они доставаться не должны.
+ARCHIVED = {
+    Post: ArchivedPost,
+    Comment: ArchivedComment,
+    PostRevision: ArchivedPostRevision,
+}
+
+
+@contextmanager
+def keep_pub_date():
+    # auto_now_add перезаписал бы дату публикации (и правки) текущим
+    # временем.
+    fields = [
+        model._meta.get_field(name) for model, name in (
+            (Post, "pub_date"), (Comment, "pub_date"),
+            (PostRevision, "created"),
+        )
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def max_pk(model):
+    """Наибольший id модели, для постов, комментариев и версий -
+    вместе с архивом."""
+    return max(
+        table.objects.aggregate(max_pk=Max("pk"))["max_pk"] or 0
+        for table in (model, ARCHIVED.get(model, model))
+    )
+
+
+def reset_sequences(*models):
+    # После вставки с явными id (PostgreSQL) счётчики нужно догнать.
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def rendered(objects):
+    # bulk_create обходит save(), поэтому HTML текста готовится здесь.
+    for obj in objects:
+        obj.text_html = render_text(obj.text)
+    return objects
@@ -1,11 +1,22 @@
 from core.models import DateTimeModel
+from core.text import render_text
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .thumbnails import thumbnail_url, update_thumbnail
+
 User = get_user_model()
 
 
+def render_text_html(instance, update_fields=None):
+    """Обновляет text_html перед save() и возвращает update_fields."""
+    if update_fields is not None and "text" not in update_fields:
+        return update_fields
+    instance.text_html = render_text(instance.text)
+    return None if update_fields is None else {*update_fields, "text_html"}
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name="Group title")
     slug = models.SlugField(unique=True, verbose_name="Slug")
@@ -41,6 +52,23 @@ class Post(DateTimeModel):
         blank=True
     )
 
+    # Готовый HTML текста: шаблоны не прогоняют urlize на каждый показ.
+    text_html = models.TextField(editable=False, blank=True)
+    # Миниатюра для ленты, созданная при сохранении картинки: показ
+    # поста не обращается к хранилищу метаданных sorl.thumbnail.
+    thumbnail = models.CharField(max_length=255, editable=False, blank=True)
+    thumbnail_width = models.PositiveIntegerField(
+        editable=False, blank=True, null=True
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        editable=False, blank=True, null=True
+    )
+    # Растёт с каждой правкой: входит в ключи кэша, зависящие от текста.
+    version = models.PositiveIntegerField("Версия", default=1)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
+
+    is_archived = False
+
     class Meta:
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
@@ -49,6 +77,58 @@ class Post(DateTimeModel):
     def __str__(self):
         return self.text[: settings.STR_LIMIT]
 
+    @property
+    def thumbnail_url(self):
+        return thumbnail_url(self.thumbnail)
+
+    def save(self, *args, **kwargs):
+        kwargs["update_fields"] = render_text_html(
+            self, kwargs.get("update_fields")
+        )
+        kwargs["update_fields"] = update_thumbnail(
+            self, kwargs["update_fields"]
+        )
+        super().save(*args, **kwargs)
+
+
+class PostRevision(models.Model):
+    """Версия поста: полный текст (снимок) или сжатая разница с
+    предыдущей версией. Собирается функциями posts.revisions."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="revisions",
+        verbose_name="Пост",
+    )
+    number = models.PositiveIntegerField("Номер версии")
+    is_snapshot = models.BooleanField("Полный снимок", default=False)
+    data = models.BinaryField("Данные")
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        blank=True,
+        null=True,
+        verbose_name="Группа",
+    )
+    image = models.CharField("Картинка", max_length=100, blank=True)
+    created = models.DateTimeField("Дата правки", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Версия поста"
+        verbose_name_plural = "Версии постов"
+        ordering = ["post", "number"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "number"],
+                name="unique_post_revision",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} v{self.number}"
+
 
 class Comment(DateTimeModel):
     post = models.ForeignKey(
@@ -68,11 +148,18 @@ class Comment(DateTimeModel):
         "Текст комментария",
         help_text="Напишите комментарий",
     )
+    text_html = models.TextField(editable=False, blank=True)
 
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
 
+    def save(self, *args, **kwargs):
+        kwargs["update_fields"] = render_text_html(
+            self, kwargs.get("update_fields")
+        )
+        super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -95,3 +182,116 @@ class Follow(models.Model):
                 name='unique_follow'
             )
         ]
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из горячей таблицы командой archive_posts.
+
+    Сохраняет исходный id, чтобы старые ссылки /posts/<id>/ продолжали
+    работать. Связи без ограничений БД: архив может жить в отдельной
+    базе (settings.ARCHIVE_DATABASE).
+    """
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField("Текст поста")
+    text_html = models.TextField(editable=False, blank=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        verbose_name="Автор",
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        blank=True,
+        null=True,
+        verbose_name="Группа",
+    )
+    image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    thumbnail = models.CharField(max_length=255, editable=False, blank=True)
+    thumbnail_width = models.PositiveIntegerField(
+        editable=False, blank=True, null=True
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        editable=False, blank=True, null=True
+    )
+    pub_date = models.DateTimeField("Дата создания", db_index=True)
+    version = models.PositiveIntegerField("Версия", default=1)
+    archived_at = models.DateTimeField("Дата архивации", auto_now_add=True)
+
+    is_archived = True
+
+    @property
+    def thumbnail_url(self):
+        return thumbnail_url(self.thumbnail)
+
+    class Meta:
+        verbose_name = "Архивный пост"
+        verbose_name_plural = "Архивные посты"
+        ordering = ["-pub_date"]
+        indexes = [models.Index(fields=["author", "-pub_date"])]
+
+    def __str__(self):
+        return self.text[: settings.STR_LIMIT]
+
+
+class ArchivedPostRevision(models.Model):
+    """Версия архивного поста: строка PostRevision, перенесённая вместе
+    с постом, чтобы история правок оставалась доступной."""
+
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name="revisions",
+        verbose_name="Пост",
+    )
+    number = models.PositiveIntegerField("Номер версии")
+    is_snapshot = models.BooleanField("Полный снимок", default=False)
+    data = models.BinaryField("Данные")
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        blank=True,
+        null=True,
+        verbose_name="Группа",
+    )
+    image = models.CharField("Картинка", max_length=100, blank=True)
+    created = models.DateTimeField("Дата правки")
+
+    class Meta:
+        verbose_name = "Версия архивного поста"
+        verbose_name_plural = "Версии архивных постов"
+        ordering = ["post", "number"]
+
+    def __str__(self):
+        return f"{self.post_id} v{self.number}"
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name="comments",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        verbose_name="Автор публикации",
+    )
+    text = models.TextField("Текст комментария")
+    text_html = models.TextField(editable=False, blank=True)
+    pub_date = models.DateTimeField("Дата создания")
+
+    class Meta:
+        verbose_name = "Архивный комментарий"
+        verbose_name_plural = "Архивные комментарии"
@@ -0,0 +1,134 @@
+"""История правок поста.
+
+Версия 1 - исходный текст, дальше каждая правка хранится как построчная
+разница с предыдущей версией, сжатая zlib. Каждые
+POST_REVISION_SNAPSHOT_EVERY версий сохраняется полный снимок, поэтому
+для сборки любой версии нужно не больше этого числа разниц.
+"""
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Post, PostRevision
+
+
+def make_delta(old, new):
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, False)
+    return [
+        (i1, i2, "".join(new_lines[j1:j2]))
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def apply_delta(text, delta):
+    lines = text.splitlines(keepends=True)
+    # С конца, чтобы индексы ещё не применённых правок не сдвигались.
+    for i1, i2, replacement in reversed(delta):
+        lines[i1:i2] = [replacement]
+    return "".join(lines)
+
+
+def encode(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode())
+
+
+def decode(data):
+    return json.loads(zlib.decompress(bytes(data)).decode())
+
+
+def revision_text(revision, previous=None):
+    if revision.is_snapshot:
+        return decode(revision.data)
+    return apply_delta(previous, decode(revision.data))
+
+
+@transaction.atomic
+def save_edit(post):
+    """Сохраняет правку текста поста и её версию.
+
+    post уже содержит новые данные, прежние читаются из базы. Версия
+    увеличивается в UPDATE (F-выражение): строка поста заблокирована до
+    конца транзакции, и одновременные правки получают разные номера.
+    Версия 1 записывается при первой правке, у неотредактированных постов
+    истории нет.
+    """
+    Post.objects.filter(pk=post.pk).update(version=F("version") + 1)
+    previous = Post.objects.only(
+        "text", "group_id", "image", "version"
+    ).get(pk=post.pk)
+    post.version = previous.version
+    if post.version == 2:
+        PostRevision.objects.create(
+            post=post, number=1, is_snapshot=True,
+            data=encode(previous.text),
+            group_id=previous.group_id,
+            image=previous.image.name or "",
+        )
+    post.save()
+    is_snapshot = (
+        (post.version - 1) % settings.POST_REVISION_SNAPSHOT_EVERY == 0
+    )
+    PostRevision.objects.create(
+        post=post,
+        number=post.version,
+        is_snapshot=is_snapshot,
+        data=encode(
+            post.text if is_snapshot
+            else make_delta(previous.text, post.text)
+        ),
+        group_id=post.group_id,
+        image=post.image.name or "",
+    )
+
+
+def get_revision_text(post, number):
+    """Текст версии number: ближайший снимок и не больше
+    POST_REVISION_SNAPSHOT_EVERY разниц после него."""
+    if number == post.version:
+        return post.text
+    snapshot = post.revisions.filter(
+        is_snapshot=True, number__lte=number
+    ).order_by("-number").first()
+    if snapshot is None:
+        raise PostRevision.DoesNotExist
+    text = revision_text(snapshot)
+    for revision in post.revisions.filter(
+        number__gt=snapshot.number, number__lte=number
+    ):
+        text = revision_text(revision, text)
+    return text
+
+
+def history_cache_key(post):
+    # Правка меняет version, и старый ключ просто перестаёт читаться.
+    return f"posts:history:{post.pk}:{post.version}"
+
+
+def get_history(post):
+    """Все версии поста, от новой к старой: (номер, дата, текст)."""
+    key = history_cache_key(post)
+    history = cache.get(key)
+    if history is None:
+        history, text = [], None
+        revisions = post.revisions.only(
+            "number", "is_snapshot", "data", "created"
+        )
+        for revision in revisions:
+            text = revision_text(revision, text)
+            created = post.pub_date if revision.number == 1 else (
+                revision.created
+            )
+            history.append((revision.number, created, text))
+        if not history:
+            history.append((post.version, post.pub_date, post.text))
+        history.reverse()
+        cache.set(key, history, settings.POST_HISTORY_CACHE_TIMEOUT)
+    return history
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ARCHIVE_MODELS = {"archivedpost", "archivedpostrevision", "archivedcomment"}
+
+
+def is_archive_model(model):
+    return (
+        model._meta.app_label == "posts"
+        and model._meta.model_name in ARCHIVE_MODELS
+    )
+
+
+class ArchiveRouter:
+    """Архивные модели живут в базе settings.ARCHIVE_DATABASE.
+
+    Связанные с архивом пользователи и группы по-прежнему читаются из
+    основной базы, даже если запрос идёт от архивного объекта.
+    """
+
+    def db_for_read(self, model, **hints):
+        if is_archive_model(model):
+            return settings.ARCHIVE_DATABASE
+        instance = hints.get("instance")
+        if instance is not None and is_archive_model(instance.__class__):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if any(is_archive_model(obj.__class__) for obj in (obj1, obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == "posts" and model_name in ARCHIVE_MODELS:
+            return db == settings.ARCHIVE_DATABASE
+        if db != DEFAULT_DB_ALIAS and db == settings.ARCHIVE_DATABASE:
+            return False
+        return None
@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, PostRevision
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        cls.group = Group.objects.create(
+            title="Заголовок",
+            slug="slug",
+            description="Описание",
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for _ in range(count):
+            user = User.objects.create_user(
+                username=f"user{User.objects.count()}"
+            )
+            post = Post.objects.create(
+                text="Текст", author=user, group=self.group
+            )
+            Comment.objects.create(post=post, author=user, text="Ответ")
+            Follow.objects.create(user=user, author=self.admin)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка в админке не зависит от числа строк."""
+        for model in ("post", "comment", "follow"):
+            url = reverse(f"admin:posts_{model}_changelist")
+            with self.subTest(model=model):
+                self.add_rows(2)
+                self.client.get(url)
+                few = self.count_queries(url)
+                self.add_rows(8)
+                self.assertEqual(self.count_queries(url), few)
+
+
+class AdminPostEditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        cls.group = Group.objects.create(title="Группа", slug="slug")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.post = Post.objects.create(text="Текст", author=self.admin)
+
+    def test_changelist_group_edit(self):
+        """Смена группы в списке постов сохраняется без новой версии."""
+        response = self.client.post(
+            reverse("admin:posts_post_changelist"),
+            {
+                "form-TOTAL_FORMS": "1",
+                "form-INITIAL_FORMS": "1",
+                "form-MIN_NUM_FORMS": "0",
+                "form-MAX_NUM_FORMS": "1000",
+                "form-0-id": str(self.post.pk),
+                "form-0-group": str(self.group.pk),
+                "_save": "Сохранить",
+            },
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.group, self.group)
+        self.assertEqual(self.post.version, 1)
+        self.assertFalse(PostRevision.objects.exists())
+
+    def test_change_form_text_edit(self):
+        """Правка текста в форме поста создаёт версии с прежними
+        группой и картинкой."""
+        response = self.client.post(
+            reverse("admin:posts_post_change", args=[self.post.pk]),
+            {
+                "text": "Новый текст",
+                "author": str(self.admin.pk),
+                "group": str(self.group.pk),
+                "_save": "Сохранить",
+            },
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, 2)
+        first = PostRevision.objects.get(number=1)
+        self.assertIsNone(first.group_id)
+        self.assertEqual(
+            PostRevision.objects.get(number=2).group_id, self.group.pk
+        )
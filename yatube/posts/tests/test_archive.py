@@ -0,0 +1,156 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..management.utils import max_pk
+from ..models import (ArchivedComment, ArchivedPost, ArchivedPostRevision,
+                      Comment, Post)
+from ..revisions import save_edit
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="author")
+        cls.old_posts = []
+        for number in range(12):
+            post = Post.objects.create(
+                text=f"Старый {number}", author=cls.user
+            )
+            Comment.objects.create(
+                post=post, author=cls.user, text=f"Ответ {number}"
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=400 + number)
+            )
+            cls.old_posts.append(post)
+        # Экземпляр из базы: у объектов old_posts в памяти прежняя pub_date.
+        edited = Post.objects.get(pk=cls.old_posts[-1].pk)
+        edited.text = "Старый 11, исправленный"
+        save_edit(edited)
+        cls.new_post = Post.objects.create(text="Свежий", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        call_command(
+            "archive_posts", older_than=365, batch_size=5,
+            stdout=StringIO(),
+        )
+
+    def test_old_posts_moved_to_archive(self):
+        """Старые посты и их комментарии переезжают в архив с прежними
+        id, свежие остаются."""
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list("id", flat=True)),
+            {post.pk for post in self.old_posts},
+        )
+        self.assertEqual(ArchivedComment.objects.count(), 12)
+
+    def test_post_detail_falls_back_to_archive(self):
+        """Архивный пост открывается по старому адресу, без формы
+        комментария."""
+        post = self.old_posts[0]
+        response = self.client.get(
+            reverse("posts:post_detail", args=[post.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["post"].text, post.text)
+        self.assertEqual(response.context["total_posts"], 13)
+        self.assertEqual(
+            [comment.text for comment in response.context["comments"]],
+            ["Ответ 0"],
+        )
+        self.assertNotContains(
+            response, reverse("posts:add_comment", args=[post.pk])
+        )
+
+    def test_profile_continues_into_archive(self):
+        """Профиль показывает сначала горячие посты, затем архивные."""
+        url = reverse("posts:profile", args=[self.user.username])
+        first = self.client.get(url).context["page_obj"]
+        second = self.client.get(url, {"page": 2}).context["page_obj"]
+        self.assertEqual(first.paginator.count, 13)
+        self.assertEqual(first[0], self.new_post)
+        self.assertTrue(all(post.is_archived for post in first[1:]))
+        self.assertEqual(len(second), 3)
+        fragment = self.client.get(
+            reverse("posts:feed_fragment", args=["profile", "author"]),
+            {"cursor": first.next_cursor},
+        )
+        self.assertEqual(
+            [post.pk for post in fragment.context["posts"]],
+            [post.pk for post in second],
+        )
+
+    def test_revisions_moved_to_archive(self):
+        """История правок переезжает вместе с постом и открывается."""
+        post = self.old_posts[-1]
+        self.assertEqual(ArchivedPostRevision.objects.count(), 2)
+        response = self.client.get(
+            reverse("posts:post_history", args=[post.pk])
+        )
+        self.assertEqual(
+            [text for _, _, text in response.context["history"]],
+            ["Старый 11, исправленный", "Старый 11"],
+        )
+
+    @override_settings(PAGINATOR_EXACT_COUNT_LIMIT=5)
+    def test_profile_approximate_count(self):
+        """Профиль с архивом не считает всё число постов точно."""
+        url = reverse("posts:profile", args=[self.user.username])
+        paginator = self.client.get(url).context["page_obj"].paginator
+        self.assertEqual(paginator.count, 13)
+        self.assertEqual(paginator.display_count, "5+")
+
+
+class ArchiveConflictTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="author")
+        self.posts = []
+        for number in range(2):
+            post = Post.objects.create(
+                text=f"Старый {number}", author=self.user
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=400)
+            )
+            self.posts.append(post)
+        # id первого поста уже занят в архиве другим постом.
+        ArchivedPost.objects.create(
+            id=self.posts[0].pk, text="Другой пост", author_id=self.user.pk,
+            pub_date=timezone.now() - timedelta(days=800),
+        )
+
+    def test_conflicting_post_stays_hot(self):
+        """Пост, чей id в архиве занят чужой строкой, не удаляется."""
+        err = StringIO()
+        call_command(
+            "archive_posts", older_than=365, stdout=StringIO(), stderr=err,
+        )
+        self.assertEqual(list(Post.objects.all()), [self.posts[0]])
+        self.assertEqual(
+            ArchivedPost.objects.get(pk=self.posts[0].pk).text, "Другой пост"
+        )
+        self.assertTrue(
+            ArchivedPost.objects.filter(pk=self.posts[1].pk).exists()
+        )
+        self.assertIn("Не перенесено постов: 1", err.getvalue())
+
+    def test_new_ids_skip_archive(self):
+        """Сдвиг id импорта и генератора учитывает архив."""
+        ArchivedPost.objects.create(
+            id=1000, text="Архив", author_id=self.user.pk,
+            pub_date=timezone.now(),
+        )
+        self.assertEqual(max_pk(Post), 1000)
@@ -0,0 +1,209 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from core.cache import view_cache_key
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                      Post)
+from ..revisions import get_history, save_edit
+
+User = get_user_model()
+TEMP_CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SHARED_CACHES = {
+    **settings.CACHES,
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": TEMP_CACHE_DIR,
+    },
+}
+
+
+class ExportImportCommandsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="User")
+        cls.another_user = User.objects.create_user(username="Another")
+        cls.group = Group.objects.create(
+            title="Заголовок",
+            slug="slug",
+            description="Описание",
+        )
+        for number in range(5):
+            post = Post.objects.create(
+                text=f"Текст {number}",
+                author=cls.user,
+                group=cls.group if number % 2 else None,
+            )
+            Comment.objects.create(
+                post=post, author=cls.another_user, text=f"Ответ {number}"
+            )
+        Follow.objects.create(user=cls.another_user, author=cls.user)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "yatube.jsonl.gz")
+
+    def test_export_import_round_trip(self):
+        """Выгрузка и загрузка восстанавливают посты, комментарии,
+        группы и подписки с исходными датами."""
+        dates = list(Post.objects.values_list("text", "pub_date"))
+        call_command("export_yatube", self.path, stdout=StringIO())
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        Follow.objects.all().delete()
+        call_command(
+            "import_yatube", self.path, batch_size=2,
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            list(Post.objects.values_list("text", "pub_date")), dates
+        )
+        self.assertEqual(Comment.objects.count(), 5)
+        self.assertEqual(
+            Post.objects.filter(group__slug=self.group.slug).count(), 2
+        )
+        self.assertTrue(Follow.objects.filter(
+            user=self.another_user, author=self.user
+        ).exists())
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_round_trip_keeps_history_and_archive(self):
+        """История правок и архивные посты с комментариями и версиями
+        тоже переживают выгрузку и загрузку."""
+        post = Post.objects.get(text="Текст 0")
+        post.text = "Текст 0, исправленный"
+        save_edit(post)
+        call_command(
+            "archive_posts", older_than=-1, stdout=StringIO(),
+        )
+        post = Post.objects.create(text="Свежий", author=self.user)
+        post.text = "Свежий, исправленный"
+        save_edit(post)
+        call_command("export_yatube", self.path, stdout=StringIO())
+        Post.objects.all().delete()
+        ArchivedPost.objects.all().delete()
+        call_command("import_yatube", self.path, stdout=StringIO())
+        self.assertEqual(ArchivedPost.objects.count(), 5)
+        self.assertEqual(ArchivedComment.objects.count(), 5)
+        archived = ArchivedPost.objects.get(text="Текст 0, исправленный")
+        self.assertEqual(
+            [text for _, _, text in get_history(archived)],
+            ["Текст 0, исправленный", "Текст 0"],
+        )
+        post = Post.objects.get()
+        self.assertEqual(
+            [text for _, _, text in get_history(post)],
+            ["Свежий, исправленный", "Свежий"],
+        )
+
+    def test_import_resumes(self):
+        """Повторный импорт с тем же состоянием не дублирует записи."""
+        call_command("export_yatube", self.path, stdout=StringIO())
+        Post.objects.all().delete()
+        for _ in range(2):
+            call_command(
+                "import_yatube", self.path, stdout=StringIO(),
+            )
+        self.assertEqual(Post.objects.count(), 5)
+
+
+class SeedAndBenchCommandsTests(TestCase):
+    def test_seed_yatube(self):
+        """seed_yatube создаёт заданное количество записей."""
+        call_command(
+            "seed_yatube", users=10, groups=2, posts=50, comments=30,
+            follows_per_user=3, batch_size=20, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(user=F("author")).exists())
+
+    def test_bench_yatube(self):
+        """bench_yatube печатает строку по каждой странице."""
+        call_command(
+            "seed_yatube", users=5, groups=1, posts=20, comments=10,
+            follows_per_user=2, stdout=StringIO(),
+        )
+        out = StringIO()
+        call_command("bench_yatube", iterations=2, stdout=out)
+        for view in ("index", "group_posts", "profile", "post_detail",
+                     "follow_index"):
+            with self.subTest(view=view):
+                self.assertIn(view, out.getvalue())
+
+
+class RerenderTextsCommandTests(TestCase):
+    def test_rerender_texts(self):
+        """rerender_texts заполняет HTML у записей, созданных в обход
+        save(), и не трогает уже актуальные."""
+        user = User.objects.create_user(username="User")
+        fresh = Post.objects.create(text="Готовый", author=user)
+        Post.objects.bulk_create([Post(text="Без HTML", author=user)])
+        out = StringIO()
+        call_command("rerender_texts", batch_size=1, stdout=out)
+        self.assertIn("проверено 2, обновлено 1", out.getvalue())
+        self.assertEqual(
+            Post.objects.exclude(pk=fresh.pk).get().text_html, "Без HTML"
+        )
+
+
+@override_settings(CACHES=SHARED_CACHES, STAMPEDE_CACHE="shared")
+class WarmCachesCommandTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        caches["shared"].clear()
+
+    def test_warm_caches(self):
+        """После warm_caches главная отдаётся из кэша без запросов к БД."""
+        call_command(
+            "seed_yatube", users=5, groups=2, posts=30, comments=10,
+            follows_per_user=2, stdout=StringIO(),
+        )
+        cache.clear()
+        out = StringIO()
+        keys = []
+
+        def record_key(*args):
+            keys.append(view_cache_key(*args))
+            return keys[-1]
+
+        with mock.patch("core.cache.view_cache_key", record_key):
+            call_command(
+                "warm_caches", pages=2, groups=1, profiles=2, concurrency=1,
+                host="testserver", stdout=out,
+            )
+            warmed = set(keys)
+            with self.assertNumQueries(0):
+                response = self.client.get(reverse("posts:index"))
+        self.assertIn("Страниц: 5", out.getvalue())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(keys[-1], warmed)
+
+    def test_requires_site(self):
+        """Без адреса сайта или с кэшем одного процесса команда не
+        работает вхолостую."""
+        with self.assertRaisesMessage(CommandError, "--host"):
+            call_command("warm_caches", stdout=StringIO())
+        with self.settings(STAMPEDE_CACHE="default"):
+            with self.assertRaisesMessage(CommandError, "--base-url"):
+                call_command(
+                    "warm_caches", host="testserver", stdout=StringIO()
+                )
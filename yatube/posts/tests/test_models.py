@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.template import Context, Template
 from django.test import TestCase
 
 from ..models import Group, Post
@@ -58,3 +59,21 @@ class PostModelTest(TestCase):
                     post._meta.get_field(value).help_text,
                     expected
                 )
+
+
+class TextHtmlTest(TestCase):
+    def test_text_html_rendered_on_save(self):
+        """HTML текста готовится при сохранении и совпадает с выводом
+        фильтров linebreaksbr|urlizetrunc."""
+        user = User.objects.create_user(username="auth")
+        post = Post.objects.create(
+            author=user, text="<b>Ссылка</b>\nhttps://example.com/"
+        )
+        expected = Template(
+            "{{ text|linebreaksbr|urlizetrunc:40 }}"
+        ).render(Context({"text": post.text}))
+        self.assertEqual(post.text_html, expected)
+        post.text = "Новый текст"
+        post.save(update_fields=["text"])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, "Новый текст")
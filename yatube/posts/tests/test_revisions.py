@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, PostRevision
+from ..revisions import (apply_delta, get_revision_text, make_delta,
+                         save_edit)
+
+User = get_user_model()
+
+
+@override_settings(POST_REVISION_SNAPSHOT_EVERY=3)
+class PostRevisionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="author")
+        self.post = Post.objects.create(
+            text="первая строка\nвторая строка", author=self.user
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.texts = [self.post.text]
+
+    def edit(self, text):
+        self.client.post(
+            reverse("posts:post_edit", args=[self.post.pk]), {"text": text}
+        )
+        self.texts.append(text)
+
+    def test_delta_round_trip(self):
+        """Разница, применённая к старому тексту, даёт новый."""
+        old = "a\nb\nc\nd\n"
+        new = "a\nB\nc\nd\ne"
+        self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+    def test_every_revision_is_rebuilt(self):
+        """Любая версия собирается из снимка и разниц, снимки пишутся
+        каждые POST_REVISION_SNAPSHOT_EVERY версий."""
+        for number in range(6):
+            self.edit(f"первая строка\nправка {number}")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, 7)
+        self.assertEqual(
+            list(PostRevision.objects.filter(
+                is_snapshot=True
+            ).values_list("number", flat=True)),
+            [1, 4, 7],
+        )
+        for number, text in enumerate(self.texts, start=1):
+            with self.subTest(number=number):
+                self.assertEqual(get_revision_text(self.post, number), text)
+
+    def test_stale_instance_gets_next_number(self):
+        """Номер версии берётся из базы, а не из устаревшего объекта."""
+        stale = Post.objects.get(pk=self.post.pk)
+        self.edit("вторая версия")
+        stale.text = "параллельная правка"
+        save_edit(stale)
+        self.assertEqual(stale.version, 3)
+        self.assertEqual(
+            get_revision_text(stale, 2), "вторая версия"
+        )
+
+    def test_unchanged_form_creates_no_revision(self):
+        """Отправка формы без изменений не создаёт версию."""
+        self.edit(self.post.text)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, 1)
+        self.assertFalse(PostRevision.objects.exists())
+
+    def test_history_page(self):
+        """История показывает все версии от новой к старой и обновляется
+        после правки."""
+        url = reverse("posts:post_history", args=[self.post.pk])
+        self.edit("вторая версия")
+        self.client.get(url)
+        self.edit("третья версия")
+        history = self.client.get(url).context["history"]
+        self.assertEqual(
+            [text for number, created, text in history],
+            list(reversed(self.texts)),
+        )
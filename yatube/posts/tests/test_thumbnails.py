@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from core.images import image_url
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostThumbnailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="User")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text="Текст",
+            author=self.user,
+            image=SimpleUploadedFile("small.gif", SMALL_GIF, "image/gif"),
+        )
+
+    def test_thumbnail_saved_with_post(self):
+        """Миниатюра строится при сохранении и сбрасывается вместе
+        с картинкой."""
+        self.assertTrue(self.post.thumbnail)
+        self.assertEqual(
+            (self.post.thumbnail_width, self.post.thumbnail_height),
+            (700, 350),
+        )
+        self.post.image = None
+        self.post.save()
+        self.assertEqual(self.post.thumbnail, "")
+        self.assertIsNone(self.post.thumbnail_width)
+
+    def test_feed_without_thumbnail_queries(self):
+        """Лента показывает миниатюру из строки поста без запросов к
+        хранилищу sorl.thumbnail."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, self.post.thumbnail_url)
+        self.assertFalse(any(
+            "thumbnail_kvstore" in query["sql"] for query in queries
+        ))
+
+    def test_feed_fallback_to_image_endpoint(self):
+        """Без готовой миниатюры лента ссылается на /img/, а не строит
+        её во время рендера."""
+        Post.objects.update(thumbnail="")
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(
+            response, image_url(self.post.image.name, 700, 350)
+        )
+
+    def test_kvstore_in_cache(self):
+        """Метаданные миниатюр sorl не пишутся в базу."""
+        with self.assertNumQueries(0):
+            get_thumbnail(self.post.image, "100x100")
+
+    def test_build_thumbnails(self):
+        """build_thumbnails дополняет посты без миниатюры."""
+        Post.objects.update(thumbnail="", thumbnail_width=None)
+        out = StringIO()
+        call_command("build_thumbnails", stdout=out)
+        self.assertIn("проверено 1, обновлено 1", out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_width, 700)
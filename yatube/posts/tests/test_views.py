@@ -327,6 +327,62 @@ class PostPaginatorTests(TestCase):
                 self.assertEqual(post.group, PostPaginatorTests.group)
                 self.assertEqual(post.text, f"Текст {post.id-1}")
 
+    def test_pages_query_count(self):
+        """Проверка: число запросов не зависит от числа постов на
+        странице."""
+        pages = {
+            reverse(
+                "posts:profile",
+                kwargs={"username": PostPaginatorTests.user.username}
+            ): 4,
+            reverse(
+                "posts:post_detail",
+                kwargs={"post_id": PostPaginatorTests.post.pk}
+            ): 4,
+        }
+        for reverse_name, queries in pages.items():
+            with self.subTest(reverse_name=reverse_name):
+                with self.assertNumQueries(queries):
+                    self.client.get(reverse_name)
+
+    def test_feed_fragment_cursor(self):
+        """Проверка: фрагмент ленты отдаёт пачку постов и курсор
+        следующей пачки."""
+        namespace_list = [
+            reverse("posts:feed_fragment", args=["index"]),
+            reverse(
+                "posts:feed_fragment",
+                args=["group", PostPaginatorTests.group.slug]
+            ),
+            reverse(
+                "posts:feed_fragment",
+                args=["profile", PostPaginatorTests.user.username]
+            ),
+        ]
+        for reverse_name in namespace_list:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.client.get(reverse_name)
+                self.assertEqual(
+                    len(response.context["posts"]), settings.POSTS_PER_PAGE
+                )
+                cursor = response["X-Next-Cursor"]
+                response = self.client.get(reverse_name, {"cursor": cursor})
+                posts = response.context["posts"]
+                self.assertEqual(len(posts), settings.POSTS_PER_PAGE - 1)
+                self.assertEqual(posts[-1].text, "Текст 0")
+                self.assertFalse(response.has_header("X-Next-Cursor"))
+
+    def test_feed_fragment_follow_requires_login(self):
+        """Проверка: лента подписок недоступна анониму."""
+        response = self.client.get(
+            reverse("posts:feed_fragment", args=["follow"])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.authorized_client.get(
+            reverse("posts:feed_fragment", args=["follow"])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
 
 class CacheViewsTest(TestCase):
     @classmethod
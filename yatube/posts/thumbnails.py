@@ -0,0 +1,48 @@
+import logging
+
+from sorl.thumbnail import default, get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Миниатюра для posts/includes/post_item.html. Пока её нет в строке поста,
+# шаблон показывает такую же обрезку через /img/ (core.images).
+GEOMETRY = "700x350"
+OPTIONS = {"crop": "center", "upscale": True}
+FIELDS = ("thumbnail", "thumbnail_width", "thumbnail_height")
+
+
+def make_thumbnail(image):
+    """Путь и размеры миниатюры картинки или пустые значения."""
+    if not image:
+        return "", None, None
+    try:
+        thumbnail = get_thumbnail(image, GEOMETRY, **OPTIONS)
+        # Без исходника sorl возвращает заглушку без размеров.
+        return thumbnail.name, thumbnail.width, thumbnail.height
+    except Exception:
+        logger.exception("Не удалось построить миниатюру %s", image.name)
+        return "", None, None
+
+
+def update_thumbnail(post, update_fields=None):
+    """Перед save(): строит миниатюру новой картинки и возвращает
+    update_fields. Неизменённая картинка с готовой миниатюрой не
+    трогается."""
+    if update_fields is not None and "image" not in update_fields:
+        return update_fields
+    image = post.image
+    uploaded = bool(image) and not image._committed
+    if not uploaded and bool(image) == bool(post.thumbnail):
+        return update_fields
+    if uploaded:
+        # Файл сохраняется заранее (иначе это сделал бы pre_save поля):
+        # sorl читает исходник из хранилища.
+        image.save(image.name, image.file, save=False)
+    values = make_thumbnail(image)
+    for field, value in zip(FIELDS, values):
+        setattr(post, field, value)
+    return None if update_fields is None else {*update_fields, *FIELDS}
+
+
+def thumbnail_url(name):
+    return default.storage.url(name)
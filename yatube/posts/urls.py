@@ -9,6 +9,11 @@ urlpatterns = [
     path("profile/<str:username>/", views.profile, name="profile"),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
     path("posts/<int:post_id>/edit/", views.post_edit, name="post_edit"),
+    path(
+        "posts/<int:post_id>/history/",
+        views.post_history,
+        name="post_history"
+    ),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     path("create/", views.post_create, name="post_create"),
     path(
@@ -16,7 +21,13 @@ urlpatterns = [
         views.add_comment,
         name="add_comment"
     ),
+    path(
+        "posts/<int:post_id>/events/",
+        views.comment_events,
+        name="comment_events"
+    ),
     path("follow/", views.follow_index, name="follow_index"),
+    path("follow/events/", views.follow_events, name="follow_events"),
     path(
         "profile/<str:username>/follow/",
         views.profile_follow,
@@ -27,4 +38,10 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow",
     ),
+    path("feed/<str:feed>/", views.feed_fragment, name="feed_fragment"),
+    path(
+        "feed/<str:feed>/<str:key>/",
+        views.feed_fragment,
+        name="feed_fragment"
+    ),
 ]
@@ -1,8 +1,60 @@
-from django.core.paginator import Paginator
+from datetime import datetime, timedelta
+
+from core.paginator import ApproximateCountPaginator
+from django.db.models import Q
+from django.utils import timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(post):
+    delta = post.pub_date - EPOCH
+    microseconds = (delta.days * 86400 + delta.seconds) * 10 ** 6
+    return f"{microseconds + delta.microseconds}-{post.pk}"
+
+
+def decode_cursor(cursor):
+    try:
+        microseconds, pk = (int(part) for part in cursor.split("-", 1))
+    except (AttributeError, ValueError):
+        return None
+    return EPOCH + timedelta(microseconds=microseconds), pk
 
 
 def paginate_posts(request, posts, posts_per_page):
-    paginator = Paginator(posts, posts_per_page)
+    paginator = ApproximateCountPaginator(posts, posts_per_page)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    page_obj.next_cursor = (
+        encode_cursor(page_obj[len(page_obj) - 1])
+        if page_obj.has_next() else None
+    )
     return page_obj
+
+
+def older_than_cursor(posts, cursor):
+    posts = posts.order_by("-pub_date", "-pk")
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        pub_date, pk = position
+        posts = posts.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )
+    return posts
+
+
+def paginate_cursor(posts, cursor, posts_per_page, archived=None):
+    """Keyset-страница: посты строго старше курсора и курсор следующей.
+
+    archived дочитывается, когда горячие посты закончились.
+    """
+    batch = list(older_than_cursor(posts, cursor)[:posts_per_page + 1])
+    if archived is not None and len(batch) <= posts_per_page:
+        batch += older_than_cursor(archived, cursor)[
+            :posts_per_page + 1 - len(batch)
+        ]
+    next_cursor = None
+    if len(batch) > posts_per_page:
+        batch = batch[:posts_per_page]
+        next_cursor = encode_cursor(batch[-1])
+    return batch, next_cursor
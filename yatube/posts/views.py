@@ -1,16 +1,22 @@
+from core.cache import cached_view
+from core.pubsub import publish, sse_response
+from core.streaming import stream_render
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.http import HttpResponseForbidden
+from django.http import Http404, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.urls import reverse
 
+from .archive import (archived_posts, author_posts, count_author_posts,
+                      get_comments, get_post_or_archived)
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post
-from .utils import paginate_posts
+from .revisions import get_history, save_edit
+from .utils import paginate_cursor, paginate_posts
 
 
-@cache_page(20)
+@cached_view(20)
 def index(request):
     posts = Post.objects.select_related('group', 'author').all()
     page_obj = paginate_posts(request, posts, settings.POSTS_PER_PAGE)
@@ -33,9 +39,9 @@ def group_posts(request, slug):
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author__username=username)
-    total_posts = posts.count()
+    posts = author_posts(author)
     page_obj = paginate_posts(request, posts, settings.POSTS_PER_PAGE)
+    total_posts = page_obj.paginator.display_count
     following = request.user.is_authenticated and author.following.filter(
         user=request.user).exists()
     context = {
@@ -44,15 +50,19 @@ def profile(request, username):
         "page_obj": page_obj,
         "following": following,
     }
+    if settings.STREAM_RESPONSES:
+        return stream_render(request, "posts/profile.html", context)
     return render(request, "posts/profile.html", context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_archived(post_id)
     author = post.author
     form = CommentForm()
-    comments = post.comments.select_related('author').all()
-    total_posts = Post.objects.filter(author=post.author).count()
+    comments = get_comments(post)
+    if settings.STREAM_RESPONSES and not post.is_archived:
+        comments = comments.iterator(chunk_size=settings.STREAMING_CHUNK_SIZE)
+    total_posts = count_author_posts(author)
     following = request.user.is_authenticated and author.following.filter(
         user=request.user
     ).exists()
@@ -63,7 +73,10 @@ def post_detail(request, post_id):
         "comments": comments,
         "form": form,
         "following": following,
+        "live_comments": settings.LIVE_COMMENTS and not post.is_archived,
     }
+    if settings.STREAM_RESPONSES:
+        return stream_render(request, "posts/post_detail.html", context)
     return render(request, "posts/post_detail.html", context)
 
 
@@ -75,7 +88,15 @@ def post_create(request):
     )
     if form.is_valid():
         form.instance.author = request.user
-        form.save()
+        post = form.save()
+        if settings.LIVE_COMMENTS:
+            publish(f"author:{post.author_id}", "post", {
+                "id": post.pk,
+                "author": request.user.username,
+                "text": post.text,
+                "pub_date": post.pub_date,
+                "url": reverse("posts:post_detail", args=[post.pk]),
+            })
         return redirect("posts:profile", username=request.user.username)
     context = {"form": form, "groups": Group.objects.all()}
     return render(request, "posts/create_post.html", context)
@@ -92,7 +113,11 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        # Версию создаёт только правка текста.
+        if "text" in form.changed_data:
+            save_edit(form.save(commit=False))
+        elif form.has_changed():
+            form.save()
         return redirect("posts:post_detail", post_id=post_id)
 
     context = {
@@ -103,6 +128,15 @@ def post_edit(request, post_id):
     return render(request, "posts/create_post.html", context)
 
 
+def post_history(request, post_id):
+    post = get_post_or_archived(post_id)
+    context = {
+        "post": post,
+        "history": get_history(post),
+    }
+    return render(request, "posts/post_history.html", context)
+
+
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -112,14 +146,23 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        if settings.LIVE_COMMENTS:
+            publish(f"post:{post.pk}", "comment", {
+                "id": comment.pk,
+                "author": request.user.username,
+                "text": comment.text,
+                "pub_date": comment.pub_date,
+            })
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = Post.objects.select_related('group', 'author').filter(
+        author__following__user=request.user
+    )
     page_obj = paginate_posts(request, posts, settings.POSTS_PER_PAGE)
-    context = {"page_obj": page_obj}
+    context = {"page_obj": page_obj, "live_posts": settings.LIVE_COMMENTS}
     return render(request, 'posts/follow.html', context)
 
 
@@ -144,3 +187,51 @@ def profile_unfollow(request, username):
     Follow.objects.filter(
         user=request.user, author__username=username).delete()
     return redirect("posts:profile", username)
+
+
+def get_feed_posts(request, feed, key=None):
+    if feed == "index":
+        return Post.objects.select_related("group", "author")
+    if feed == "group":
+        group = get_object_or_404(Group, slug=key)
+        return group.posts.select_related("author", "group")
+    if feed == "profile":
+        return Post.objects.select_related("group", "author").filter(
+            author__username=key)
+    if feed == "follow" and request.user.is_authenticated:
+        return Post.objects.select_related("group", "author").filter(
+            author__following__user=request.user)
+    raise Http404
+
+
+@cached_view(settings.FEED_CACHE_TIMEOUT)
+def feed_fragment(request, feed, key=None):
+    posts = get_feed_posts(request, feed, key)
+    archived = None
+    if feed == "profile":
+        archived = archived_posts(get_object_or_404(User, username=key))
+    page, next_cursor = paginate_cursor(
+        posts, request.GET.get("cursor"), settings.POSTS_PER_PAGE, archived
+    )
+    context = {"posts": page, "next_cursor": next_cursor}
+    response = render(request, "posts/includes/feed_fragment.html", context)
+    if next_cursor:
+        response["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def comment_events(request, post_id):
+    if not settings.LIVE_COMMENTS:
+        raise Http404
+    post = get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    return sse_response([f"post:{post.pk}"])
+
+
+@login_required
+def follow_events(request):
+    if not settings.LIVE_COMMENTS:
+        raise Http404
+    authors = Follow.objects.filter(user=request.user).values_list(
+        "author_id", flat=True
+    )
+    return sse_response([f"author:{author}" for author in authors])
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = "users"
+
+    def ready(self):
+        from . import auth  # noqa: F401  подключает сброс кэша пользователя
+        from django.contrib.auth.password_validation import \
+            get_default_password_validators
+
+        # Валидаторы (и словарь распространённых паролей) создаются при
+        # старте процесса, а не на первой регистрации.
+        get_default_password_validators()
@@ -0,0 +1,70 @@
+from core.cache import is_shared
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+User = get_user_model()
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def user_cache():
+    """Кэш пользователей или None, если AUTH_USER_CACHE не общий для
+    воркеров: сброс после смены пароля в одном процессе не дошёл бы до
+    копий в других, поэтому пользователь тогда читается из БД."""
+    if not is_shared(settings.AUTH_USER_CACHE):
+        return None
+    return caches[settings.AUTH_USER_CACHE]
+
+
+def get_cached_user(request):
+    """Как django.contrib.auth.get_user, но объект пользователя берётся
+    из кэша. Без сессии (аноним) не выполняется ни одного обращения."""
+    session = request.session
+    user_id = session.get(auth.SESSION_KEY)
+    backend = session.get(auth.BACKEND_SESSION_KEY)
+    if user_id is None or backend not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    cache = user_cache()
+    if cache is None:
+        return auth.get_user(request)
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+    session_hash = session.get(auth.HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    )):
+        session.flush()
+        return AnonymousUser()
+    user.backend = backend
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Смена пароля, профиля или last_login сбрасывает кэш: хэш сессии
+    # сверяется с актуальным паролем.
+    cache = user_cache()
+    if cache is not None:
+        cache.delete(user_cache_key(instance.pk))
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def param(algorithm, name, default):
+    return settings.PASSWORD_HASHER_PARAMS.get(algorithm, {}).get(
+        name, default
+    )
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 с параметрами из settings.PASSWORD_HASHER_PARAMS.
+
+    Имя алгоритма прежнее, поэтому существующие хэши проверяются, а
+    хэши со старыми параметрами пересчитываются при следующем входе
+    (must_update).
+    """
+
+    @property
+    def time_cost(self):
+        return param("argon2", "time_cost", super().time_cost)
+
+    @property
+    def memory_cost(self):
+        return param("argon2", "memory_cost", super().memory_cost)
+
+    @property
+    def parallelism(self):
+        return param("argon2", "parallelism", super().parallelism)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return param("bcrypt", "rounds", super().rounds)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return param("pbkdf2", "iterations", super().iterations)
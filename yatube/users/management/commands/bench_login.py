@@ -0,0 +1,88 @@
+import math
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+User = get_user_model()
+
+PASSWORD = "correct horse battery staple"
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет стоимость хэширования для настроенных алгоритмов, "
+        "подсказывает параметры под целевое время и считает пропускную "
+        "способность входа через users:login."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--logins", type=int, default=20)
+        parser.add_argument(
+            "--target-ms", type=float, default=50,
+            help="Желаемое время одной проверки пароля.",
+        )
+
+    def handle(self, *args, **options):
+        for hasher in get_hashers():
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(
+                        f"{hasher.algorithm}: библиотека не установлена"
+                    )
+                    continue
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+            verify_ms = median_ms(
+                lambda: hasher.verify(PASSWORD, encoded), options["repeat"]
+            )
+            self.stdout.write(
+                f"{hasher.algorithm:<22} проверка {verify_ms:8.1f} мс"
+                f"  {self.suggest(hasher, verify_ms, options['target_ms'])}"
+            )
+        self.bench_logins(options["logins"])
+
+    def suggest(self, hasher, verify_ms, target_ms):
+        scale = target_ms / verify_ms
+        if hasattr(hasher, "time_cost"):
+            return (
+                f"time_cost={max(1, round(hasher.time_cost * scale))} "
+                f"при memory_cost={hasher.memory_cost}"
+            )
+        if hasattr(hasher, "rounds"):
+            return f"rounds={hasher.rounds + round(math.log2(scale))}"
+        return f"iterations={round(hasher.iterations * scale, -4):.0f}"
+
+    def bench_logins(self, count):
+        url = reverse("users:login")
+        with transaction.atomic():
+            user = User.objects.create_user(
+                "bench_login_user", None, PASSWORD
+            )
+            started = time.perf_counter()
+            for _ in range(count):
+                Client().post(url, {
+                    "username": user.username, "password": PASSWORD,
+                })
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f"Вход через {url}: {count / elapsed:.1f} в секунду "
+            f"({elapsed * 1000 / count:.1f} мс на вход)"
+        )
@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+TEMP_CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SHARED_CACHES = {
+    **settings.CACHES,
+    "users": {
+        # Файловый кэш виден всем процессам, в отличие от LocMemCache.
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": TEMP_CACHE_DIR,
+    },
+}
+
+
+@override_settings(
+    CACHES=SHARED_CACHES, AUTH_USER_CACHE="users",
+    SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+)
+class CachedAuthenticationTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["users"].clear()
+        self.user = User.objects.create_user(
+            username="user", password="Pa55-w0rd-x"
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse("posts:profile", args=[self.user.username])
+
+    def test_no_session_or_user_queries(self):
+        """Сессия и пользователь не стоят запросов к БД."""
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        self.authorized_client.get(self.url)
+        with self.assertNumQueries(4):
+            response = self.authorized_client.get(self.url)
+        self.assertEqual(response.context["user"], self.user)
+
+    def test_password_change_invalidates_cached_user(self):
+        """После смены пароля старая сессия больше не действует."""
+        self.authorized_client.get(self.url)
+        self.user.set_password("An0ther-pa55")
+        self.user.save()
+        response = self.authorized_client.get(self.url)
+        self.assertFalse(response.context["user"].is_authenticated)
+
+    @override_settings(AUTH_USER_CACHE="default")
+    def test_local_cache_falls_back_to_db(self):
+        """С кэшем одного процесса пользователь читается из БД."""
+        self.authorized_client.get(self.url)
+        with self.assertNumQueries(5):
+            response = self.authorized_client.get(self.url)
+        self.assertEqual(response.context["user"], self.user)
+        self.assertIsNone(caches["default"].get(f"auth:user:{self.user.pk}"))
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import \
+    get_default_password_validators
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+
+from ..validators import CommonPasswordValidator
+
+User = get_user_model()
+
+HASHERS = ["users.hashers.PBKDF2PasswordHasher"]
+
+
+class PasswordPolicyTests(TestCase):
+    def test_common_passwords_loaded_once(self):
+        """Словарь распространённых паролей общий для всех валидаторов."""
+        validators = [
+            validator for validator in get_default_password_validators()
+            if isinstance(validator, CommonPasswordValidator)
+        ]
+        self.assertEqual(len(validators), 1)
+        self.assertIsInstance(validators[0].passwords, frozenset)
+        self.assertIs(
+            CommonPasswordValidator().passwords, validators[0].passwords
+        )
+        with self.assertRaises(ValidationError):
+            validators[0].validate("password")
+
+    @override_settings(
+        PASSWORD_HASHERS=HASHERS,
+        PASSWORD_HASHER_PARAMS={"pbkdf2": {"iterations": 1000}},
+    )
+    def test_password_rehashed_on_login(self):
+        """Хэш со старыми параметрами пересчитывается при входе."""
+        user = User.objects.create_user("user", password="Pa55-w0rd-x")
+        self.assertIn("$1000$", user.password)
+        with self.settings(
+            PASSWORD_HASHER_PARAMS={"pbkdf2": {"iterations": 2000}}
+        ):
+            self.assertTrue(
+                self.client.login(username="user", password="Pa55-w0rd-x")
+            )
+        user.refresh_from_db()
+        self.assertIn("$2000$", user.password)
@@ -0,0 +1,19 @@
+from django.contrib.auth import password_validation
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """Список распространённых паролей читается из gzip один раз на
+    процесс (при старте, см. UsersConfig.ready) и хранится во frozenset."""
+
+    loaded = {}
+
+    def __init__(self, password_list_path=password_validation
+                 .CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH):
+        self.passwords = self.load(password_list_path)
+
+    @classmethod
+    def load(cls, path):
+        if path not in cls.loaded:
+            validator = password_validation.CommonPasswordValidator(path)
+            cls.loaded[path] = frozenset(validator.passwords)
+        return cls.loaded[path]
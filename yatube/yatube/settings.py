@@ -1,3 +1,4 @@
+import importlib.util
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -7,11 +8,14 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "4nt0&l0zan7w@u(cl55n_j4#p*py%m#t49*8c%0w^4+*((*-my"
+# Ключ из репозитория годится только для разработки.
+SECRET_KEY = os.getenv(
+    "SECRET_KEY", "4nt0&l0zan7w@u(cl55n_j4#p*py%m#t49*8c%0w^4+*((*-my"
+)
 
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DEBUG", "True").lower() in ("1", "true", "yes")
 
 ALLOWED_HOSTS = [
     "localhost",
@@ -42,11 +46,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.compression.CompressionMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "users.auth.CachedAuthenticationMiddleware",
+    "core.profiler.ProfilerMiddleware",
+    "core.slowlog.SlowQueryMiddleware",
+    "core.ratelimit.RateLimitMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -58,8 +68,19 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [os.path.join(BASE_DIR, "templates")],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # In development templates are re-read on every render so edits
+            # show up at once; in production each template is compiled once
+            # per process by the cached loader.
+            "loaders": [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ] if DEBUG else [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -76,6 +97,47 @@ WSGI_APPLICATION = "yatube.wsgi.application"
 # Applications settings
 
 POSTS_PER_PAGE = 10
+# Выше этого числа строк пагинатор не считает COUNT(*) точно, а показывает
+# "1000+" (оценка планировщика или кэшированный счёт).
+PAGINATOR_EXACT_COUNT_LIMIT = 1000
+PAGINATOR_COUNT_CACHE_TIMEOUT = 300
+FEED_CACHE_TIMEOUT = 20
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "").lower() in (
+    "1", "true", "yes"
+)
+STREAMING_CHUNK_SIZE = 200
+STREAMING_FLUSH_BYTES = 16 * 1024
+# Server-Sent Events: лимит одновременных потоков на процесс, размер
+# очереди событий клиента и алиас общего кэша для доставки между воркерами.
+# Каждый открытый поток держит синхронный воркер WSGI до SSE_MAX_DURATION
+# секунд, поэтому новые комментарии и посты подписок в реальном времени
+# (LIVE_COMMENTS) включаются только там, где потоки обслуживает отдельный
+# пул процессов (например, gunicorn с gevent за /posts/<id>/events/ и
+# /follow/events/).
+LIVE_COMMENTS = os.getenv("LIVE_COMMENTS", "").lower() in (
+    "1", "true", "yes"
+)
+SSE_MAX_CONNECTIONS = 100
+SSE_QUEUE_SIZE = 100
+SSE_KEEPALIVE = 15
+SSE_MAX_DURATION = 300
+PUBSUB_CACHE = None
+# Ограничение частоты записи: имя URL -> частота (POST) или словарь
+# с методами. Частота "10/m" - не больше 10 запросов в фиксированном окне
+# в минуту (не корзина токенов: на стыке окон возможен всплеск до 20).
+# Счётчики окон живут в кэше RATELIMIT_CACHE.
+RATELIMIT_CACHE = "default"
+# За обратным прокси адрес клиента берётся из заголовка, который прокси
+# выставляет сам (например, HTTP_X_FORWARDED_FOR), RATELIMIT_TRUSTED_PROXIES
+# - число доверенных прокси перед приложением. Без заголовка - REMOTE_ADDR.
+RATELIMIT_IP_HEADER = os.getenv("RATELIMIT_IP_HEADER")
+RATELIMIT_TRUSTED_PROXIES = int(os.getenv("RATELIMIT_TRUSTED_PROXIES", "1"))
+RATELIMITS = {
+    "posts:post_create": "10/m",
+    "posts:add_comment": "20/m",
+    "posts:profile_follow": {"rate": "30/m", "methods": ("GET", "POST")},
+    "users:signup": "5/h",
+}
 STR_LIMIT = 15
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -86,12 +148,86 @@ DATABASES = {
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
     }
 }
+# Compression
+# Ответы сжимаются brotli (пакет Brotli) или gzip. Сжатые тела страниц
+# с max-age (cached_view) хранятся в COMPRESSION_CACHE по хэшу содержимого.
+COMPRESSION_MIN_LENGTH = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_LEVEL = 6
+COMPRESSION_CACHE = "default"
+
+# Cache stampede
+# core.cache.cached_view вместо cache_page: по истечении страницу
+# пересчитывает один запрос (блокировка в STAMPEDE_CACHE), остальные
+# STAMPEDE_STALE_TIMEOUT секунд получают прежнюю. STAMPEDE_BETA задаёт
+# вероятностное досрочное обновление (XFetch), 0 - выключить.
+STAMPEDE_CACHE = "default"
+STAMPEDE_STALE_TIMEOUT = 60
+STAMPEDE_LOCK_TIMEOUT = 10
+STAMPEDE_POLL_INTERVAL = 0.05
+STAMPEDE_BETA = 1.0
+
+# Archive
+# Посты старше ARCHIVE_AFTER_DAYS дней вместе с комментариями команда
+# archive_posts переносит в архивные таблицы. Они живут в базе
+# ARCHIVE_DATABASE: по умолчанию в основной, но её можно вынести в
+# отдельный alias, чтобы горячие таблицы и их индексы оставались малыми.
+ARCHIVE_DATABASE = os.getenv("ARCHIVE_DATABASE", "default")
+ARCHIVE_AFTER_DAYS = 365
+if ARCHIVE_DATABASE not in DATABASES:
+    DATABASES[ARCHIVE_DATABASE] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, f"{ARCHIVE_DATABASE}.sqlite3"),
+    }
+DATABASE_ROUTERS = ["posts.routers.ArchiveRouter"]
+
+# Text rendering
+# HTML текстов постов и комментариев готовится при записи (core.text).
+# Markdown включается TEXT_MARKDOWN=1 и требует пакета markdown. После
+# смены правил сохранённый HTML пересобирает команда rerender_texts.
+TEXT_MARKDOWN = os.getenv("TEXT_MARKDOWN", "").lower() in (
+    "1", "true", "yes"
+) and importlib.util.find_spec("markdown") is not None
+TEXT_MARKDOWN_EXTENSIONS = ["fenced_code", "nl2br", "sane_lists"]
+TEXT_URLIZE_LIMIT = 40
+
+# Post history
+# Каждая POST_REVISION_SNAPSHOT_EVERY-я версия поста хранится целиком,
+# остальные - разницей с предыдущей.
+POST_REVISION_SNAPSHOT_EVERY = 10
+POST_HISTORY_CACHE_TIMEOUT = 60 * 60
+# Thumbnails
+# Метаданные миниатюр sorl.thumbnail хранятся только в кэше
+# THUMBNAIL_CACHE (core.thumbnails.KVStore), без таблицы в основной
+# базе; в production это должен быть общий для воркеров кэш. Миниатюра
+# картинки поста строится при сохранении, путь и размеры лежат в его
+# строке (posts.thumbnails), а старые посты дополняет build_thumbnails.
+THUMBNAIL_KVSTORE = "core.thumbnails.KVStore"
+THUMBNAIL_CACHE = os.getenv("THUMBNAIL_CACHE", "default")
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # LocMemCache со счётчиком попаданий для /metrics.
+        'BACKEND': 'core.metrics.InstrumentedLocMemCache',
     }
 }
 
+# Sessions
+# Подписанная cookie вместо строки в БД: сессия не требует запроса, а у
+# анонима без cookie её нет вовсе. Подпись держится на SECRET_KEY,
+# поэтому по умолчанию такие сессии включаются, только когда ключ задан
+# в окружении, а не взят из репозитория.
+SESSION_ENGINE = os.getenv(
+    "SESSION_ENGINE",
+    "django.contrib.sessions.backends.signed_cookies"
+    if os.getenv("SECRET_KEY") else "django.contrib.sessions.backends.db",
+)
+# Объект пользователя берётся из кэша AUTH_USER_CACHE (users.auth), и
+# аутентифицированный запрос обходится без SQL. Кэш должен быть общим
+# для воркеров (Memcached, Redis): с LocMemCache пользователь читается
+# из БД, иначе другие процессы не узнали бы о смене пароля.
+AUTH_USER_CACHE = os.getenv("AUTH_USER_CACHE", "default")
+AUTH_USER_CACHE_TIMEOUT = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -105,8 +241,7 @@ AUTH_PASSWORD_VALIDATORS = [
         "django.contrib.auth.password_validation.MinimumLengthValidator",
     },
     {
-        "NAME":
-        "django.contrib.auth.password_validation.CommonPasswordValidator",
+        "NAME": "users.validators.CommonPasswordValidator",
     },
     {
         "NAME":
@@ -114,6 +249,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# Первым идёт предпочтительный алгоритм: им хэшируются новые пароли, а
+# хэши других алгоритмов или с другими параметрами прозрачно пересчитываются
+# при входе. Argon2 и bcrypt требуют пакетов argon2-cffi и bcrypt; без них
+# используется PBKDF2. Параметры подобраны командой bench_login: около
+# 25 мс на проверку Argon2 и 75 мс bcrypt на одном ядре.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "argon2")
+PASSWORD_HASHER_PARAMS = {
+    "argon2": {"time_cost": 2, "memory_cost": 19456, "parallelism": 1},
+    "bcrypt": {"rounds": 10},
+    "pbkdf2": {"iterations": 150000},
+}
+_PASSWORD_HASHERS = {
+    "argon2": ("argon2", "users.hashers.Argon2PasswordHasher"),
+    "bcrypt": ("bcrypt", "users.hashers.BCryptSHA256PasswordHasher"),
+    "pbkdf2": (None, "users.hashers.PBKDF2PasswordHasher"),
+}
+PASSWORD_HASHERS = [
+    hasher for name, (library, hasher) in _PASSWORD_HASHERS.items()
+    if library is None or importlib.util.find_spec(library) is not None
+]
+PASSWORD_HASHERS.sort(key=lambda hasher: hasher != _PASSWORD_HASHERS.get(
+    PASSWORD_HASHER, (None, None))[1])
+PASSWORD_HASHERS += [
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -133,9 +294,66 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 STATIC_URL = "/yatube/static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.getenv("STATIC_ROOT", os.path.join(BASE_DIR, "staticfiles"))
+# В production статику раздаёт WhiteNoise из STATIC_ROOT: имена с хэшем
+# содержимого (кэшируются навсегда, Cache-Control: immutable) и заранее
+# сжатые .br/.gz копии. Для разработки - файлы прямо из STATICFILES_DIRS.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    )
+WHITENOISE_AUTOREFRESH = DEBUG
+# Сторонние скрипты из base.html: команда vendor_assets скачивает их,
+# сверяет с integrity (SRI) и склеивает в static/js/vendor.bundle.js.
+VENDOR_ASSETS = [
+    (
+        "https://code.jquery.com/jquery-3.6.0.min.js",
+        "sha256-/xUj+3OJU5yExlq6GSYGSHk7tPXikynS7ogEvDej/m4=",
+    ),
+    (
+        "https://cdnjs.cloudflare.com/ajax/libs/popper.js/2.6.0/umd/"
+        "popper.min.js",
+        "sha512-BmM0/BQlqh02wuK5Gz9yrbe7VyIVwOzD1o40yi1IsTjriX/NGF37NyXHfmFz"
+        "IlMmoSIBXgqDiG1VNU6kB5dBbA==",
+    ),
+    (
+        "https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/js/"
+        "bootstrap.min.js",
+        "sha384-B4gt1jrGC7Jh4AgTPSdUtOBvfO8shuf57BaghqFfPlYxofvL8/KUEfYiJOM"
+        "MV+rV",
+    ),
+]
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Медиафайлы отдаёт core.views.media (ETag, Range). С MEDIA_ACCEL
+# "x-accel" (nginx, internal location MEDIA_ACCEL_PREFIX с alias на
+# MEDIA_ROOT) или "x-sendfile" (Apache, lighttpd) Django только проверяет
+# доступ, а файл передаёт сервер. MEDIA_ACCESS_CHECKS - пути к функциям
+# (request, path) -> bool для приватных файлов; с ними ответы не
+# кэшируются прокси.
+MEDIA_ACCEL = os.getenv("MEDIA_ACCEL", "")
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+MEDIA_ACCESS_CHECKS = []
+MEDIA_MAX_AGE = 24 * 60 * 60
+
+# Images
+# /img/<токен>/<ширина>x<высота>/<формат> отдаёт обрезанные копии
+# картинок (core.images); токен подписан вместе с размером и форматом.
+# Копии строятся в пуле из IMAGE_WORKERS процессов (0 - в потоке запроса)
+# и лежат в IMAGE_CACHE_DIR. Сверх IMAGE_CACHE_MAX_BYTES давно не
+# запрошенные удаляются, пока не останется IMAGE_CACHE_LOW_WATERMARK.
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_QUEUE_FACTOR = 4
+IMAGE_TIMEOUT = 30
+IMAGE_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR", os.path.join(BASE_DIR, "image_cache")
+)
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+IMAGE_CACHE_LOW_WATERMARK = 0.9
+IMAGE_MAX_DIMENSION = 2000
+IMAGE_QUALITY = 85
+IMAGE_MAX_AGE = 365 * 24 * 60 * 60
 
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"
@@ -146,4 +364,81 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 INTERNAL_IPS = [
     "127.0.0.1",
-]
\ No newline at end of file
+]
+
+# Metrics
+# core.metrics считает запросы, задержки, время в БД и попадания в кэш.
+# С METRICS_DIR (общий каталог для всех воркеров) /metrics складывает
+# снимки всех процессов, без него показывает только текущий. Страница
+# открыта staff и адресам из METRICS_ALLOWED_IPS (через запятую, по
+# умолчанию никому: за прокси на одной машине 127.0.0.1 - любой клиент).
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = 5
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_ALLOWED_IPS = [
+    address.strip()
+    for address in os.getenv("METRICS_ALLOWED_IPS", "").split(",")
+    if address.strip()
+]
+
+# Profiler
+# Выборочное профилирование запросов (core.profiler): заголовок
+# X-Profile: <PROFILER_TOKEN>, параметр ?_profile для staff или случайный
+# один запрос из PROFILER_SAMPLE_RATE (0 - выключено). Профили лежат в
+# PROFILER_DIR и доступны staff на /profiles/.
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "").lower() in (
+    "1", "true", "yes"
+)
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN", "")
+PROFILER_SAMPLE_RATE = int(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL = 0.005
+PROFILER_DIR = os.getenv("PROFILER_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILER_KEEP = 100
+PROFILER_MAX_QUERIES = 50
+
+# Slow queries
+# Запросы дольше SLOW_QUERY_THRESHOLD_MS (пустое значение - выключено,
+# по умолчанию) пишутся в SLOW_QUERY_LOG с view, строкой вызова и
+# планом EXPLAIN. Сводку по отпечаткам SQL печатает команда slow_queries.
+SLOW_QUERY_THRESHOLD_MS = float(
+    os.getenv("SLOW_QUERY_THRESHOLD_MS", "") or "inf"
+)
+SLOW_QUERY_LOG = os.getenv(
+    "SLOW_QUERY_LOG", os.path.join(BASE_DIR, "logs", "slow_queries.jsonl")
+)
+
+# Logging
+# Access-лог - строка JSON на запрос: в stdout (ACCESS_LOG=-) или в файл.
+# По умолчанию включён только в production.
+ACCESS_LOG = os.getenv("ACCESS_LOG", "" if DEBUG else "-")
+if ACCESS_LOG == "-":
+    ACCESS_LOG_HANDLER = {
+        "class": "logging.StreamHandler",
+        "stream": "ext://sys.stdout",
+        "formatter": "json",
+    }
+elif ACCESS_LOG:
+    ACCESS_LOG_HANDLER = {
+        "class": "logging.handlers.WatchedFileHandler",
+        "filename": ACCESS_LOG,
+        "formatter": "json",
+    }
+else:
+    ACCESS_LOG_HANDLER = {"class": "logging.NullHandler"}
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "core.log.JSONFormatter"},
+    },
+    "handlers": {
+        "access": ACCESS_LOG_HANDLER,
+    },
+    "loggers": {
+        "yatube.access": {
+            "handlers": ["access"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}